@@ -3,15 +3,29 @@
 
 import os
 import time
-import random
 import pyglet
 from pyglet.window import key
 from collections import defaultdict
 import datetime
 import numpy as np
-import copy as cp
 import locale
 import sys
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from cube_anytime import solve_anytime
+from cube_daemon import client_solve, daemon_solve, start_daemon
+from cube_engine import FaceList, apply_moves, faces_to_state, from_kociemba, to_kociemba, turn
+from cube_portfolio import is_valid_solution
+from cube_speculate import Speculator
+from cube_splice import SpliceRecord
+from cube_supervisor import (DeadlineExceeded, SolveCancelled, SolveTimeout, deadline_after, get_supervisor,
+                             remaining_time, supervised_solve)
+from cube_symmetry import normalize_colors
+from cube_validate import VALID, reason_message, validate_batch, validate_cube_string
+from cube_warmup import start_warmup, wait_warmup
+from cube_zobrist import ZobristHash
 
 # 标记是否导入了高级求解器
 has_advanced_solver = False
@@ -83,8 +97,8 @@ def save_solution_to_file(steps):
         "U": "顶面顺时针旋转",
         "U'": "顶面逆时针旋转",
         "U2": "顶面旋转180度",
-        "D": "底面逆时针旋转", 
-        "D'": "底面顺时针旋转",
+        "D": "底面顺时针旋转", 
+        "D'": "底面逆时针旋转",
         "D2": "底面旋转180度",
         "L": "左面顺时针旋转",
         "L'": "左面逆时针旋转",
@@ -199,9 +213,8 @@ def show_full_history(steps):
 # 初始化faces数组
 def initialize_faces():
     global faces
-    faces = [np.zeros((3, 3))]
-    for i in range(1, 6):
-        faces.append(np.ones((3, 3)) + faces[i - 1])
+    # 六个面是同一个54元素uint8数组上的3x3视图
+    faces = FaceList()
     return faces
 
 # 全局变量初始化
@@ -223,21 +236,6 @@ total_step_count = 0  # 记录总步数，用于显示解魔方的进度
       1 1 1
 """
 
-t = np.array([[0, 0, 1], [0, 1, 0], [1, 0, 0]])
-
-
-# 顺时针旋转 90 度
-def clockwise(face):
-    face = face.transpose().dot(t)
-    return face
-
-
-# 逆时针旋转 90 度
-def antiClockwise(face):
-    face = face.dot(t).transpose()
-    return face
-
-
 # 确保数据是numpy数组类型
 def ensure_numpy_array(data):
     if isinstance(data, list):
@@ -245,286 +243,67 @@ def ensure_numpy_array(data):
     return data
 
 
+# 所有转动都由cube_engine中预先计算好的置换表完成，
+# faces为FaceList时直接在共享的54字节状态上置换，不再深拷贝六个面
+
 # 魔方顶面顺时针旋转90度（从顶面看）
 def U(FACES):
-    # 上面本身顺时针旋转
-    FACES[0] = clockwise(ensure_numpy_array(FACES[0]))
-    # 处理其它受到影响的面
-    FACES_new = cp.deepcopy(FACES)
-    
-    # 确保所有面都是numpy数组
-    for i in range(6):
-        FACES_new[i] = ensure_numpy_array(FACES_new[i])
-    
-    a, b, c, d = FACES_new[4], FACES_new[2], FACES_new[5], FACES_new[3]
-    # 顺时针旋转：前→左→后→右→前（从顶面看）
-    FACES[4][0], FACES[2][0], FACES[5][0], FACES[3][0] = d[0], a[0], b[0], c[0]
+    turn(FACES, "U")
 
 
 # 顶面逆时针旋转90度（从顶面看）
 def _U(FACES):
-    # 上面本身逆时针旋转
-    FACES[0] = antiClockwise(ensure_numpy_array(FACES[0]))
-    FACES_new = cp.deepcopy(FACES)
-    
-    # 确保所有面都是numpy数组
-    for i in range(6):
-        FACES_new[i] = ensure_numpy_array(FACES_new[i])
-    
-    a, b, c, d = FACES_new[4], FACES_new[2], FACES_new[5], FACES_new[3]
-    # 逆时针旋转：前→右→后→左→前（从顶面看）
-    FACES[4][0], FACES[2][0], FACES[5][0], FACES[3][0] = b[0], c[0], d[0], a[0]
+    turn(FACES, "U'")
 
 
-# 底面逆时针旋转90度（从底面看）- 按下D键触发
+# 底面顺时针旋转90度（从底面看）- 按下D键触发
 def D(FACES):
-    # 底面逆时针旋转（从底面看）
-    # 更新底面（1号面），逆时针旋转
-    FACES[1] = antiClockwise(ensure_numpy_array(FACES[1]))
-    
-    # 存储周围面的底部行
-    front_row = cp.deepcopy(FACES[4][2]) # 前面底行
-    right_row = cp.deepcopy(FACES[3][2]) # 右面底行
-    back_row = cp.deepcopy(FACES[5][2])  # 后面底行
-    left_row = cp.deepcopy(FACES[2][2])  # 左面底行
-
-    # 从底面逆时针方向更新周围面的底行
-    # 前→左→后→右→前
-    FACES[2][2] = cp.deepcopy(front_row)  # 左面底行 = 前面底行
-    FACES[5][2] = cp.deepcopy(left_row)   # 后面底行 = 左面底行
-    FACES[3][2] = cp.deepcopy(back_row)   # 右面底行 = 后面底行
-    FACES[4][2] = cp.deepcopy(right_row)  # 前面底行 = 右面底行
+    turn(FACES, "D")
 
 
-# 底面顺时针旋转90度（从底面看）- 按下Shift+D键触发
+# 底面逆时针旋转90度（从底面看）- 按下Shift+D键触发
 def _D(FACES):
-    # 底面顺时针旋转（从底面看）
-    # 更新底面（1号面），顺时针旋转
-    FACES[1] = clockwise(ensure_numpy_array(FACES[1]))
-    
-    # 存储周围面的底部行
-    front_row = cp.deepcopy(FACES[4][2]) # 前面底行
-    right_row = cp.deepcopy(FACES[3][2]) # 右面底行
-    back_row = cp.deepcopy(FACES[5][2])  # 后面底行
-    left_row = cp.deepcopy(FACES[2][2])  # 左面底行
-
-    # 从底面顺时针方向更新周围面的底行
-    # 前→右→后→左→前
-    FACES[3][2] = cp.deepcopy(front_row)  # 右面底行 = 前面底行
-    FACES[5][2] = cp.deepcopy(right_row)  # 后面底行 = 右面底行
-    FACES[2][2] = cp.deepcopy(back_row)   # 左面底行 = 后面底行
-    FACES[4][2] = cp.deepcopy(left_row)   # 前面底行 = 左面底行
+    turn(FACES, "D'")
 
 
 # 魔方左面顺时针旋转90度（从左面看）
 def L(FACES):
-    # 左面本身顺时针旋转
-    FACES[2] = clockwise(ensure_numpy_array(FACES[2]))
-    FACES_new = cp.deepcopy(FACES)
-    
-    # 确保所有面都是numpy数组
-    for i in range(6):
-        FACES_new[i] = ensure_numpy_array(FACES_new[i])
-    
-    # 为方便处理，将a,b,c,d赋值为FACES_new中的前、底、后、顶面
-    # 经过旋转后，只需要各自交换它们的第一行即可，前面的第一行给底面，底面给后面，后面给顶面，顶面给前面
-    a, b, c, d = (
-        clockwise(FACES_new[4]),
-        clockwise(FACES_new[1]),
-        antiClockwise(FACES_new[5]),
-        clockwise(FACES_new[0]),
-    )
-    e, f, g, h = cp.deepcopy(a), cp.deepcopy(b), cp.deepcopy(c), cp.deepcopy(d)
-    e[0], f[0], g[0], h[0] = d[0], a[0], b[0], c[0]
-    # 交换完后，再旋转回来
-    FACES[4], FACES[1], FACES[5], FACES[0] = (
-        antiClockwise(e),
-        antiClockwise(f),
-        clockwise(g),
-        antiClockwise(h),
-    )
+    turn(FACES, "L")
 
 
 # 魔方左面逆时针旋转90度（从左面看）
 def _L(FACES):
-    # 左面本身逆时针旋转
-    FACES[2] = antiClockwise(ensure_numpy_array(FACES[2]))
-    FACES_new = cp.deepcopy(FACES)
-    
-    # 确保所有面都是numpy数组
-    for i in range(6):
-        FACES_new[i] = ensure_numpy_array(FACES_new[i])
-    
-    a, b, c, d = (
-        clockwise(FACES_new[4]),
-        clockwise(FACES_new[1]),
-        antiClockwise(FACES_new[5]),
-        clockwise(FACES_new[0]),
-    )
-    e, f, g, h = cp.deepcopy(a), cp.deepcopy(b), cp.deepcopy(c), cp.deepcopy(d)
-    e[0], f[0], g[0], h[0] = b[0], c[0], d[0], a[0]
-    FACES[4], FACES[1], FACES[5], FACES[0] = (
-        antiClockwise(e),
-        antiClockwise(f),
-        clockwise(g),
-        antiClockwise(h),
-    )
+    turn(FACES, "L'")
 
 
 # 右面顺时针旋转90度（从右面看）
 def R(FACES):
-    # 右面本身顺时针旋转
-    FACES[3] = clockwise(ensure_numpy_array(FACES[3]))
-    FACES_new = cp.deepcopy(FACES)
-    
-    # 确保所有面都是numpy数组
-    for i in range(6):
-        FACES_new[i] = ensure_numpy_array(FACES_new[i])
-    
-    a, b, c, d = (
-        antiClockwise(FACES_new[4]),
-        antiClockwise(FACES_new[1]),
-        clockwise(FACES_new[5]),
-        antiClockwise(FACES_new[0]),
-    )
-    e, f, g, h = cp.deepcopy(a), cp.deepcopy(b), cp.deepcopy(c), cp.deepcopy(d)
-    g[0], f[0], e[0], h[0] = d[0], c[0], b[0], a[0]
-    FACES[4], FACES[1], FACES[5], FACES[0] = (
-        clockwise(e),
-        clockwise(f),
-        antiClockwise(g),
-        clockwise(h),
-    )
+    turn(FACES, "R")
 
 
 # 右面逆时针旋转90度（从右面看）
 def _R(FACES):
-    # 右面本身逆时针旋转
-    FACES[3] = antiClockwise(ensure_numpy_array(FACES[3]))
-    FACES_new = cp.deepcopy(FACES)
-    
-    # 确保所有面都是numpy数组
-    for i in range(6):
-        FACES_new[i] = ensure_numpy_array(FACES_new[i])
-    
-    a, b, c, d = (
-        antiClockwise(FACES_new[4]),
-        antiClockwise(FACES_new[1]),
-        clockwise(FACES_new[5]),
-        antiClockwise(FACES_new[0]),
-    )
-    e, f, g, h = cp.deepcopy(a), cp.deepcopy(b), cp.deepcopy(c), cp.deepcopy(d)
-    f[0], g[0], h[0], e[0] = a[0], b[0], c[0], d[0]
-    FACES[4], FACES[1], FACES[5], FACES[0] = (
-        clockwise(e),
-        clockwise(f),
-        antiClockwise(g),
-        clockwise(h),
-    )
+    turn(FACES, "R'")
 
 
 # 前面顺时针旋转90度（从前面看）
 def F(FACES):
-    # 前面本身顺时针旋转
-    FACES[4] = clockwise(ensure_numpy_array(FACES[4]))
-    FACES_new = cp.deepcopy(FACES)
-    
-    # 确保所有面都是numpy数组
-    for i in range(6):
-        FACES_new[i] = ensure_numpy_array(FACES_new[i])
-    
-    a, b, c, d = (
-        clockwise(clockwise(FACES_new[0])),
-        FACES_new[1],
-        antiClockwise(FACES_new[2]),
-        clockwise(FACES_new[3]),
-    )
-    e, f, g, h = cp.deepcopy(a), cp.deepcopy(b), cp.deepcopy(c), cp.deepcopy(d)
-    e[0], g[0], f[0], h[0] = c[0], b[0], d[0], a[0]
-    FACES[0], FACES[1], FACES[2], FACES[3] = (
-        clockwise(clockwise(e)),
-        f,
-        clockwise(g),
-        antiClockwise(h),
-    )
+    turn(FACES, "F")
 
 
 # 前面逆时针旋转90度（从前面看）
 def _F(FACES):
-    # 前面本身逆时针旋转
-    FACES[4] = antiClockwise(ensure_numpy_array(FACES[4]))
-    FACES_new = cp.deepcopy(FACES)
-    
-    # 确保所有面都是numpy数组
-    for i in range(6):
-        FACES_new[i] = ensure_numpy_array(FACES_new[i])
-    
-    a, b, c, d = (
-        clockwise(clockwise(FACES_new[0])),
-        FACES_new[1],
-        antiClockwise(FACES_new[2]),
-        clockwise(FACES_new[3]),
-    )
-    e, f, g, h = cp.deepcopy(a), cp.deepcopy(b), cp.deepcopy(c), cp.deepcopy(d)
-    g[0], f[0], h[0], e[0] = a[0], c[0], b[0], d[0]
-    FACES[0], FACES[1], FACES[2], FACES[3] = (
-        clockwise(clockwise(e)),
-        f,
-        clockwise(g),
-        antiClockwise(h),
-    )
+    turn(FACES, "F'")
 
 
 # 后面顺时针旋转90度（从后面看）
 def B(FACES):
-    # 后面本身顺时针旋转
-    FACES[5] = clockwise(ensure_numpy_array(FACES[5]))
-    FACES_new = cp.deepcopy(FACES)
-    
-    # 确保所有面都是numpy数组
-    for i in range(6):
-        FACES_new[i] = ensure_numpy_array(FACES_new[i])
-    
-    a, b, c, d = (
-        FACES_new[0],
-        clockwise(clockwise(FACES_new[1])),
-        clockwise(FACES_new[2]),
-        antiClockwise(FACES_new[3]),
-    )
-    e, f, g, h = cp.deepcopy(a), cp.deepcopy(b), cp.deepcopy(c), cp.deepcopy(d)
-    g[0], f[0], h[0], e[0] = a[0], c[0], b[0], d[0]
-    FACES[0], FACES[1], FACES[2], FACES[3] = (
-        e,
-        clockwise(clockwise(f)),
-        antiClockwise(g),
-        clockwise(h),
-    )
+    turn(FACES, "B")
 
 
 # 后面逆时针旋转90度（从后面看）
 def _B(FACES):
-    # 后面本身逆时针旋转
-    FACES[5] = antiClockwise(ensure_numpy_array(FACES[5]))
-    FACES_new = cp.deepcopy(FACES)
-    
-    # 确保所有面都是numpy数组
-    for i in range(6):
-        FACES_new[i] = ensure_numpy_array(FACES_new[i])
-    
-    a, b, c, d = (
-        FACES_new[0],
-        clockwise(clockwise(FACES_new[1])),
-        clockwise(FACES_new[2]),
-        antiClockwise(FACES_new[3]),
-    )
-    e, f, g, h = cp.deepcopy(a), cp.deepcopy(b), cp.deepcopy(c), cp.deepcopy(d)
-    e[0], g[0], f[0], h[0] = c[0], b[0], d[0], a[0]
-    FACES[0], FACES[1], FACES[2], FACES[3] = (
-        e,
-        clockwise(clockwise(f)),
-        antiClockwise(g),
-        clockwise(h),
-    )
+    turn(FACES, "B'")
 
 
 # 把魔方2D数组转换成字符串输出
@@ -556,8 +335,9 @@ def set_faces(new_faces):
             print(f"错误: 第{i}个面不是3x3格式")
             return faces
     
-    # 设置新魔方状态
-    faces = new_faces
+    # 设置新魔方状态（复制到FaceList的底层状态中）
+    faces = FaceList().load(new_faces)
+    forget_solution()
     
     # 当导入新的魔方状态时，清空历史记录
     step_history = []
@@ -570,6 +350,7 @@ def set_faces(new_faces):
         print("导入的魔方状态是已完成状态（每个面颜色一致）")
     else:
         print("导入的魔方状态需要求解")
+        schedule_speculation()
     
     # 检查颜色分布是否正确
     if not state_info["valid_colors"]:
@@ -593,26 +374,62 @@ def get_color(value):
     return colors[int(value) % len(colors)]
 
 
-config = pyglet.gl.Config(double_buffer=True)
+# 窗口在setup_gui()中创建：导入本模块（包括spawn方式启动的求解子进程重新导入主模块时）
+# 不会打开窗口，也不会启动后台线程和进程
+window = None
 
 # 创建窗口 - 使用1920x1080分辨率
 window_width = 1920
 window_height = 1080
 
-# 创建窗口
-window = pyglet.window.Window(
-    width=window_width, height=window_height, 
-    caption="3D Rubik's Cube", 
-    config=config,
-    resizable=True  # 允许用户调整窗口大小
-)
-
-# 获取窗口的实际尺寸，在某些系统上可能会被调整
-window_width = window.width
-window_height = window.height
+# 窗口创建后在本进程中预热求解表（由main()/setup_gui()启动）。默认关闭：按Enter时的求解
+# 在受监管的工作进程中运行，工作进程启动时自己预热，本进程再加载一份表只会多占内存和CPU；
+# 需要在本进程中直接求解（solve_timeout = None）时再打开
+warmup_solver = False
+
+# 通过本地求解守护进程求解：表常驻在守护进程中，按N键重新启动main.py后也不必重新加载。
+# 默认关闭：打开后启动界面时会在后台启动一个独立的守护进程（空闲DAEMON_IDLE_TIMEOUT秒后自动退出，
+# 也可以用 python cube_daemon.py stop 停止）；关闭或守护进程不可用时在本进程中用supervised_solve求解
+use_solve_daemon = False
+
+def create_window():
+    """创建窗口并注册事件处理函数"""
+    global window, window_width, window_height
+    config = pyglet.gl.Config(double_buffer=True)
+    window = pyglet.window.Window(
+        width=window_width, height=window_height, 
+        caption="3D Rubik's Cube", 
+        config=config,
+        resizable=True  # 允许用户调整窗口大小
+    )
+    # 获取窗口的实际尺寸，在某些系统上可能会被调整
+    window_width = window.width
+    window_height = window.height
+    window.push_handlers(on_resize, on_key_press, on_draw)
+    return window
+
+def start_services():
+    """启动求解用的后台线程、预热和守护进程"""
+    global solve_executor, improve_executor, speculator
+    solve_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="cube-solver")
+    improve_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="cube-improver")
+    if speculative_solving:
+        # 使用守护进程时推测也交给守护进程，不再单独启动一个推测进程
+        speculator = Speculator(neighbours=speculate_neighbours,
+                                solve=speculative_daemon_solve if use_solve_daemon else None)
+    if warmup_solver:
+        start_warmup()
+    if use_solve_daemon:
+        start_daemon(wait=0)
+
+def setup_gui():
+    """打开窗口并启动后台服务；由main()或main.py在启动界面前调用，重复调用不会再创建窗口"""
+    if window is None:
+        create_window()
+        start_services()
+    return window
 
 # 添加窗口大小变化事件处理
-@window.event
 def on_resize(width, height):
     # 更新窗口尺寸变量
     global window_width, window_height
@@ -664,60 +481,20 @@ def encode_cube(faces):
     使用标准的kociemba颜色映射生成魔方字符串
     标准顺序：U, R, F, D, L, B (上右前下左后)
     """
-    # 检查中心块，确认每个面的实际颜色
-    centers = []
-    for i in range(6):
-        centers.append(int(faces[i][1][1]))
-    
-    # 调试输出
-    print(f"中心块颜色值: {centers}")
-    print(f"FACE_MAP: {FACE_MAP}")
-    
-    # 按照kociemba的顺序: U, R, F, D, L, B 组装字符串
-    cube_str = ""
-    # 上面
-    cube_str += face_to_string(faces[0])  # U
-    # 右面
-    cube_str += face_to_string(faces[3])  # R
-    # 前面 
-    cube_str += face_to_string(faces[4])  # F
-    # 下面
-    cube_str += face_to_string(faces[1])  # D
-    # 左面
-    cube_str += face_to_string(faces[2])  # L
-    # 后面
-    cube_str += face_to_string(faces[5])  # B
-    
-    return cube_str
+    # 按照kociemba的顺序: U, R, F, D, L, B 一次性取出所有贴纸组装字符串
+    state = faces.state if isinstance(faces, FaceList) else faces_to_state(faces)
+    return to_kociemba(state)
 
 # 简单高效的魔方求解函数，直接使用kociemba库
-def solve_cube(faces):
-    """使用kociemba求解魔方，返回求解步骤列表"""
-    try:
-        # 获取魔方状态字符串
-        cube_str = encode_cube(faces)
-        print(f"求解魔方: {cube_str}")
-        
-        # 使用kociemba求解
-        solution = kociemba.solve(cube_str)
-        print(f"求解成功: {solution}")
-        return solution.split()  # 返回步骤列表，如 ["R", "U'", "F2"]
-    except Exception as e:
-        print(f"求解出错: {str(e)}")
-        print("错误详情:", repr(e))
-        print("魔方状态字符串:", repr(cube_str))
-        
-        # 尝试使用修复后的字符串
-        try:
-            print("尝试修复魔方状态...")
-            fixed_str = fix_cube_string(cube_str)
-            print(f"修复后的字符串: {fixed_str}")
-            solution = kociemba.solve(fixed_str)
-            print(f"修复后求解成功: {solution}")
-            return solution.split()
-        except Exception as e2:
-            print(f"修复尝试失败: {str(e2)}")
-            return []
+def solve_cube(faces, deadline=None):
+    """使用kociemba求解魔方，返回已在引擎中验证能还原的步骤列表
+
+    deadline为time.monotonic()的截止时间，超时返回SolveTimeout（空列表）。
+    """
+    # 获取魔方状态字符串
+    cube_str = encode_cube(faces)
+    print(f"求解魔方: {cube_str}")
+    return compute_solution(cube_str, deadline)
 
 # 尝试修复魔方状态字符串
 def fix_cube_string(cube_str):
@@ -761,12 +538,8 @@ def start_cube_solving(cube_faces):
     steps = solve_cube(cube_faces)
     
     if steps:
-        # 有解法步骤，开始执行
-        solution_steps = steps
-        step_history = []  # 清空历史记录
-        is_solving = True
-        # 开始执行第一步
-        pyglet.clock.schedule_once(execute_step, 0.02)
+        # 有解法步骤，开始执行，播放期间在后台继续寻找更短的解
+        start_solution_playback(steps)
         return True
     else:
         # 没有解法步骤
@@ -790,81 +563,285 @@ def is_init_state(faces):
     # 所有面的颜色都一致，表示魔方已还原（每个面都是单一颜色）
     return True
 
-# 生成随机解法步骤
-def generate_random_solution():
-    """生成随机解法步骤"""
-    possible_moves = ["U", "U'", "U2", "D", "D'", "D2", 
-                     "L", "L'", "L2", "R", "R'", "R2",
-                     "F", "F'", "F2", "B", "B'", "B2"]
-    # 生成较长的随机解法(40-60步)，确保足够多的步数
-    num_steps = random.randint(40, 60)
-    return [random.choice(possible_moves) for _ in range(num_steps)]
-
-# 生成基本还原序列
-def generate_basic_solution():
-    """生成基本还原序列，用于kociemba失败时"""
-    # 生成一个包含魔方常用公式的序列
-    steps = []
-    
-    # 基本移动序列
-    basic_moves = ["U", "D", "L", "R", "F", "B", 
-                  "U'", "D'", "L'", "R'", "F'", "B'",
-                  "U2", "D2", "L2", "R2", "F2", "B2"]
-    
-    # 常用的公式
-    formulas = [
-        # 顶层十字
-        ["F", "R", "U", "R'", "U'", "F'"],
-        
-        # 顶层角块
-        ["R", "U", "R'", "U'"],
-        ["R", "U", "R'", "U'", "R", "U", "R'", "U'"],
-        
-        # 第二层
-        ["U", "R", "U'", "R'", "U'", "F'", "U", "F"],
-        ["U'", "L'", "U", "L", "U", "F", "U'", "F'"],
-        
-        # 底层十字
-        ["F", "R", "U", "R'", "U'", "F'"],
-        ["F", "U", "R", "U'", "R'", "F'"],
-        
-        # 底层角块定位
-        ["R", "U", "R'", "U'", "R", "U", "R'", "U'"],
-        ["R", "U", "R'", "U", "R", "U2", "R'"],
-        
-        # PLL
-        ["R", "U'", "R", "U", "R", "U", "R", "U'", "R'", "U'", "R2"],
-        ["R2", "U", "R", "U", "R'", "U'", "R'", "U'", "R'", "U", "R'"]
-    ]
-    
-    # 添加3-5个随机公式
-    num_formulas = random.randint(3, 5)
-    for _ in range(num_formulas):
-        steps.extend(random.choice(formulas))
-        
-    # 添加一些随机的基本移动
-    num_basic_moves = random.randint(10, 15)
-    for _ in range(num_basic_moves):
-        steps.append(random.choice(basic_moves))
-    
-    # 补充到至少40步
-    while len(steps) < 40:
-        steps.append(random.choice(basic_moves))
-    
-    return steps
-
 # 旋转函数映射表
 MOVE_MAP = {
-    "U": U,    "U'": _U,  "U2": lambda f: (U(f), U(f)),
-    "D": D,    "D'": _D,  "D2": lambda f: (D(f), D(f)),
-    "L": L,    "L'": _L,  "L2": lambda f: (L(f), L(f)),
-    "R": R,    "R'": _R,  "R2": lambda f: (R(f), R(f)),
-    "F": F,    "F'": _F,  "F2": lambda f: (F(f), F(f)),
-    "B": B,    "B'": _B,  "B2": lambda f: (B(f), B(f))
+    "U": U,    "U'": _U,  "U2": lambda f: turn(f, "U2"),
+    "D": D,    "D'": _D,  "D2": lambda f: turn(f, "D2"),
+    "L": L,    "L'": _L,  "L2": lambda f: turn(f, "L2"),
+    "R": R,    "R'": _R,  "R2": lambda f: turn(f, "R2"),
+    "F": F,    "F'": _F,  "F2": lambda f: turn(f, "F2"),
+    "B": B,    "B'": _B,  "B2": lambda f: turn(f, "B2")
 }
 
 is_solving = False  # 标记是否正在执行解法
 solution_steps = []  # 存储待执行的解法步骤
+playback_hash = None  # 执行解法时跟随魔方状态逐步更新的Zobrist哈希
+resolve_hashes = set()  # 起始状态和每次重新求解时的状态哈希，用于检测回路
+
+# 开始执行解法时记录起始状态
+def begin_playback_tracking():
+    """为当前faces建立增量哈希，之后每执行一步只做查表更新
+
+    扫描结果无法识别成角块/棱块时（ZobristHash抛出ValueError）不做回路检测，
+    错误不会从键盘事件处理函数中抛出。
+    """
+    global playback_hash, resolve_hashes
+    try:
+        playback_hash = ZobristHash(faces)
+    except ValueError as e:
+        print(f"无法为当前魔方建立状态哈希，本次播放不检测回路: {str(e)}")
+        playback_hash = None
+        resolve_hashes = set()
+        return
+    resolve_hashes = {playback_hash.value}
+
+# 后台求解：kociemba在工作线程中运行，pyglet事件循环继续绘制
+solve_executor = None  # 后台求解线程，在start_services()中创建
+solve_future = None  # 正在进行的后台求解
+solve_cancel = None  # 正在进行的后台求解的取消事件，ESC时设置
+solve_callback = None  # 求解完成后在事件循环中调用的函数
+solve_timeout = 10.0  # 每次求解的时限（秒），超时后结束求解进程，None表示不限时
+
+def solve_string(cube_str, deadline=None):
+    """求解kociemba字符串，返回解法字符串；超时抛出DeadlineExceeded"""
+    if use_solve_daemon:
+        return client_solve(cube_str, deadline)
+    return supervised_solve(cube_str, deadline)
+
+def repair_solution(cube_str, steps, deadline=None):
+    """解法执行完后魔方没有还原时，求解剩下的状态并接在后面；返回能还原的步骤列表，修复失败返回None"""
+    try:
+        remaining = apply_moves(normalize_colors(from_kociemba(cube_str)), steps)
+        extra = solve_string(to_kociemba(remaining), deadline).split()
+    except DeadlineExceeded:
+        raise
+    except Exception as e:
+        print(f"补全解法失败: {str(e)}")
+        return None
+    repaired = list(steps) + extra
+    if not is_valid_solution(cube_str, repaired):
+        return None
+    print(f"补全后的解法共 {len(repaired)} 步")
+    return repaired
+
+def compute_solution(cube_str, deadline=None, cancel=None):
+    """在工作线程中求解：直接求解，失败则修复后求解（没有kociemba时使用cube_twophase）
+
+    每个解法在开始播放之前先在引擎中模拟执行，不能还原的先补全，补全失败再换下一种求解方式。
+    返回步骤列表，全部失败时返回空列表，超过deadline时返回SolveTimeout。这里不访问faces等全局状态。
+    cancel是threading.Event，设置后不再开始下一种求解方式，直接返回空列表。
+    """
+    reason = validate_cube_string(cube_str)
+    if reason != VALID:
+        # 换色修复也无法解决这些问题，不必再调用求解器
+        print(f"魔方状态无法还原: {reason_message(reason)}")
+        return []
+    wait_warmup()
+    start = time.monotonic()
+    attempts = (
+        ("直接求解", lambda: cube_str),
+        ("修复后求解", lambda: fix_cube_string(cube_str)),
+    )
+    for label, make_input in attempts:
+        if cancel is not None and cancel.is_set():
+            return []
+        try:
+            steps = solve_string(make_input(), deadline).split()
+            if is_valid_solution(cube_str, steps):
+                print(f"{label}成功: {' '.join(steps)}")
+                return steps
+            print(f"{label}得到的解法无法还原魔方，尝试补全...")
+            repaired = repair_solution(cube_str, steps, deadline)
+            if repaired is not None:
+                return repaired
+        except DeadlineExceeded as e:
+            print(f"求解超时: {str(e)}")
+            return SolveTimeout(time.monotonic() - start, "compute_solution")
+        except SolveCancelled:
+            return []
+        except Exception as e:
+            print(f"{label}失败: {str(e)}")
+    return []
+
+def submit_solve(cube_str, on_done, spliced=None):
+    """提交后台求解并返回future；完成后通过pyglet.clock在事件循环中调用on_done(steps)
+
+    给出spliced（拼接得到的解法）时改用compute_with_splice，新求解只有splice_budget秒。
+    """
+    global solve_future, solve_callback, solve_cancel
+    cancel_solve()
+    solve_cancel = threading.Event()
+    if spliced:
+        solve_future = solve_executor.submit(compute_with_splice, cube_str, spliced,
+                                             deadline_after(solve_timeout), solve_cancel)
+    else:
+        solve_future = solve_executor.submit(compute_solution, cube_str, deadline_after(solve_timeout), solve_cancel)
+    solve_callback = on_done
+    pyglet.clock.schedule_interval(poll_solve_future, 0.02)
+    return solve_future
+
+def poll_solve_future(dt):
+    """由pyglet.clock定期调用，后台求解完成后把结果交给回调"""
+    global solve_future, solve_callback
+    future = solve_future
+    if future is None:
+        pyglet.clock.unschedule(poll_solve_future)
+        return
+    if not future.done():
+        return
+    pyglet.clock.unschedule(poll_solve_future)
+    callback = solve_callback
+    solve_future = None
+    solve_callback = None
+    try:
+        steps = future.result()
+    except Exception as e:
+        print(f"后台求解出错: {str(e)}")
+        steps = []
+    callback(steps)
+    window.invalid = True
+
+def cancel_solve():
+    """放弃正在进行的后台求解
+
+    还没开始的直接取消；已经开始的设置取消事件并重启求解进程，正在等待的kociemba调用立即返回。
+    使用守护进程时无法中止守护进程中的求解，所以换一个新的求解线程，下一次求解不必排队等待。
+    """
+    global solve_future, solve_callback, solve_cancel, solve_executor
+    if solve_future is None:
+        return False
+    solve_cancel.set()
+    if not solve_future.cancel():
+        if use_solve_daemon:
+            solve_executor.shutdown(wait=False)
+            solve_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="cube-solver")
+        else:
+            get_supervisor().restart()
+    solve_future = None
+    solve_callback = None
+    solve_cancel = None
+    pyglet.clock.unschedule(poll_solve_future)
+    return True
+
+# 拼接求解（见cube_splice）：再按Enter时“手动转动的逆序列 + 剩余步骤”化简后就是一个现成的解法，
+# 只给新求解splice_budget秒，两者取较短的，手动拧了几下的魔方不必等待完整求解
+splice_budget = 0.5  # 有拼接解法时新求解的时限（秒）
+splice = SpliceRecord()  # 上次求解剩余的步骤和之后的手动转动
+
+def remember_solution(steps):
+    splice.remember(steps)
+
+def forget_solution():
+    splice.forget()
+
+def record_manual_move(move):
+    splice.record(move)
+
+def spliced_solution(cube_str):
+    return splice.solution(cube_str)
+
+def compute_with_splice(cube_str, spliced, deadline=None, cancel=None):
+    """在工作线程中运行：新求解只给splice_budget秒，比拼接的解法短才使用新求解的结果"""
+    budget = deadline_after(splice_budget)
+    fresh = compute_solution(cube_str, budget if deadline is None else min(budget, deadline), cancel)
+    if fresh and len(fresh) < len(spliced):
+        return fresh
+    print(f"使用拼接的解法（{len(spliced)}步）: {' '.join(spliced)}")
+    return spliced
+
+# 推测求解：手动转动后魔方静止speculation_delay秒，就在低优先级的进程中提前求解当前状态，
+# 按Enter时直接使用算好的解法；再次转动时尚未开始的推测作废
+speculative_solving = True
+speculate_neighbours = False  # 是否同时推测再转一步的18个状态（多占用CPU，换来连续转动后也能命中）
+speculation_delay = 0.3  # 最后一次按键之后等待多久开始推测（秒）
+speculator = None  # 在start_services()中创建
+
+def schedule_speculation():
+    """魔方状态改变后调用：作废之前的推测，等空闲后重新推测"""
+    if speculator is None:
+        return
+    speculator.cancel()
+    pyglet.clock.unschedule(start_speculation)
+    pyglet.clock.schedule_once(start_speculation, speculation_delay)
+
+def speculative_daemon_solve(cube_str, deadline):
+    """推测求解只走守护进程；守护进程不可用时抛出DaemonUnavailable，这一次不推测，
+    不会回退到按Enter时使用的求解进程"""
+    return daemon_solve(cube_str, timeout=remaining_time(deadline))
+
+def start_speculation(dt):
+    """由pyglet.clock调用，正在求解或播放时不推测"""
+    if is_solving or solve_future is not None:
+        return
+    speculator.speculate(encode_cube(faces))
+
+def stop_speculation():
+    if speculator is None:
+        return
+    speculator.cancel()
+    pyglet.clock.unschedule(start_speculation)
+
+# 随时可用求解：开始播放后，在后台为解法中途的某个状态（切换点）寻找更短的后半段，
+# 播放还没有越过切换点时就换用更短的后半段
+# 默认关闭：每步只间隔0.01秒，子进程里的kociemba算出结果之前播放通常已经越过切换点，
+# 找到的更短解几乎都用不上，只是多占用一个进程
+anytime_solving = False  # 是否在播放期间继续寻找更短的解
+improve_executor = None  # 在start_services()中创建
+improvement_queue = queue.SimpleQueue()  # 后台线程找到的 (批次, 切换点之后的解法)
+improvement_generation = 0  # 每次开始新的播放加一，旧批次的结果直接丢弃
+playback_plan = []  # 当前播放计划（已执行 + 待执行），用来判断播放是否偏离了计划
+switch_point = 0  # 在播放计划的第几步之后切换
+
+def collect_improvements(generation, cube_str):
+    """在后台线程中运行，把solve_anytime陆续得到的解法放入队列"""
+    try:
+        for steps in solve_anytime(cube_str):
+            if generation != improvement_generation:
+                return
+            improvement_queue.put((generation, steps))
+    except Exception as e:
+        print(f"寻找更短解法时出错: {str(e)}")
+
+def start_anytime_improvement(steps):
+    """记录播放计划，并在后台为计划的后半段寻找更短的解法"""
+    global improvement_generation, playback_plan, switch_point
+    improvement_generation += 1
+    playback_plan = list(steps)
+    switch_point = len(steps) // 2
+    if not anytime_solving or not steps:
+        return
+    state = FaceList(faces.state)
+    state.apply(steps[:switch_point])
+    improve_executor.submit(collect_improvements, improvement_generation, to_kociemba(state.state))
+    pyglet.clock.schedule_interval(poll_improvements, 0.05)
+
+def stop_anytime_improvement():
+    global improvement_generation
+    improvement_generation += 1
+    pyglet.clock.unschedule(poll_improvements)
+
+def poll_improvements(dt):
+    """由pyglet.clock定期调用：播放还没越过切换点、且新的后半段更短时，切换到新解法"""
+    global solution_steps, playback_plan
+    if not is_solving:
+        stop_anytime_improvement()
+        return
+    while True:
+        try:
+            generation, steps = improvement_queue.get_nowait()
+        except queue.Empty:
+            return
+        if generation != improvement_generation:
+            continue
+        done = len(step_history)
+        if done > switch_point or step_history != playback_plan[:done]:
+            # 已经越过切换点或重新求解过，新解法不再适用
+            stop_anytime_improvement()
+            return
+        if len(steps) < len(playback_plan) - switch_point:
+            print(f"找到更短的解法，总步数 {len(playback_plan)} -> {switch_point + len(steps)}")
+            playback_plan = playback_plan[:switch_point] + steps
+            solution_steps = playback_plan[done:]
 
 # 添加一个检查魔方状态的函数
 def check_cube_state(faces):
@@ -884,15 +861,12 @@ def check_cube_state(faces):
     result["unique_centers"] = len(set(center_colors.values())) == 6
     
     # 统计每种颜色的数量
-    color_counts = {}
-    for face in faces:
-        for row in face:
-            for color in row:
-                color_int = int(color)
-                if color_int not in color_counts:
-                    color_counts[color_int] = 0
-                color_counts[color_int] += 1
-    result["color_counts"] = color_counts
+    state = faces.state if isinstance(faces, FaceList) else faces_to_state(faces)
+    colors, counts = np.unique(state, return_counts=True)
+    result["color_counts"] = {int(c): int(n) for c, n in zip(colors, counts)}
+    
+    # 检查能否还原：中心、颜色数量、角块/棱块、方向和奇偶性
+    result["reason"] = validate_batch(state)
     
     # 打印状态信息
     print("\n--- 魔方状态检查 ---")
@@ -913,27 +887,37 @@ def check_cube_state(faces):
             print(f"  警告: 颜色 {color} 有 {count} 块，应为9块")
     
     print(f"颜色数量是否正确: {'是' if valid_colors else '否'}")
+    print(f"能否还原: {reason_message(result['reason'])}")
     print("----------------------")
     
     result["valid_colors"] = valid_colors
     return result
 
+# 手动转动魔方的按键
+MANUAL_MOVE_KEYS = {key.F, key.B, key.L, key.R, key.U, key.D}
+
 # 修改键盘控制函数，添加状态检查功能
-@window.event
 def on_key_press(symbol, modifiers):
     global faces, is_solving, solution_steps, step_history, total_step_count
     
-    # 如果正在执行解法，不响应键盘操作（除了ESC键中断）
-    if is_solving and symbol != key.ESCAPE:
+    # 如果正在执行解法或后台求解，不响应键盘操作（除了ESC键中断）
+    if (is_solving or solve_future is not None) and symbol != key.ESCAPE:
         print("正在执行解法，请等待完成或按ESC中断...")
         return
     
-    # ESC键中断当前解法过程
-    if symbol == key.ESCAPE and is_solving:
-        print("用户中断解法执行")
+    # ESC键中断当前解法过程或取消后台求解
+    if symbol == key.ESCAPE and (is_solving or solve_future is not None):
+        if cancel_solve():
+            print("用户取消后台求解")
+        if is_solving:
+            print("用户中断解法执行")
+            # 自动重新求解时solution_steps为空，没有可以拼接的剩余步骤
+            if solution_steps:
+                remember_solution(solution_steps)
         is_solving = False
         solution_steps = []
-        return
+        window.invalid = True
+        return pyglet.event.EVENT_HANDLED
     
     # N键 - 运行外部程序拍摄新魔方
     elif symbol == key.N:
@@ -1020,48 +1004,20 @@ def on_key_press(symbol, modifiers):
             # 获取kociemba库格式的魔方状态字符串
             cube_str = encode_cube(faces)
             print(f"求解魔方: {cube_str}")
-            
-            # 尝试直接使用kociemba求解
-            try:
-                solution = kociemba.solve(cube_str)
-                print(f"求解成功: {solution}")
-                
-                solution_steps = solution.split()
-                step_history = []  # 清空历史记录
-                is_solving = True
-                # 开始执行第一步，立即执行不等待
-                pyglet.clock.schedule_once(execute_step, 0.01)
-                
-            except Exception as e:
-                print(f"直接求解失败: {str(e)}")
-                print("尝试使用修复后的字符串...")
-                
-                try:
-                    # 生成标准化的魔方状态
-                    fixed_str = fix_cube_string(cube_str)
-                    print(f"修复后的字符串: {fixed_str}")
-                    
-                    solution = kociemba.solve(fixed_str)
-                    print(f"修复后求解成功: {solution}")
-                    
-                    solution_steps = solution.split()
-                    step_history = []  # 清空历史记录
-                    is_solving = True
-                    # 立即执行
-                    pyglet.clock.schedule_once(execute_step, 0.01)
-                    
-                except Exception as e2:
-                    print(f"修复后仍然失败: {str(e2)}")
-                    print("尝试使用简单方案...")
-                    
-                    # 最后的备选方案：使用一系列基本操作
-                    print("生成基本解法步骤...")
-                    solution_steps = generate_basic_solution()
-                    step_history = []
-                    is_solving = True
-                    # 立即执行
-                    pyglet.clock.schedule_once(execute_step, 0.01)
-                
+            stop_speculation()
+            spliced = spliced_solution(cube_str)
+            steps = speculator.lookup(cube_str) if speculator is not None else None
+            if steps is not None:
+                # 转动间隙已经推测求解过这个状态
+                if spliced is not None and len(spliced) < len(steps):
+                    print(f"使用拼接的解法（{len(spliced)}步）: {' '.join(spliced)}")
+                    steps = spliced
+                else:
+                    print(f"使用预先求解的结果: {' '.join(steps)}")
+                start_solution_playback(steps)
+            else:
+                # 在后台线程求解，求解期间窗口继续刷新
+                submit_solve(cube_str, start_solution_playback, spliced)
         except Exception as e:
             print(f"求解过程中发生严重错误: {str(e)}")
             print("无法求解当前魔方状态")
@@ -1071,6 +1027,7 @@ def on_key_press(symbol, modifiers):
         test_solve()
     elif symbol == key.C:
         # 重置魔方到初始状态
+        stop_speculation()
         reset_cube()
         # 同时清空历史记录
         step_history = []
@@ -1086,6 +1043,9 @@ def on_key_press(symbol, modifiers):
         # 手动保存当前步骤到文件
         save_solution_to_file(step_history)
 
+    if symbol in MANUAL_MOVE_KEYS:
+        record_manual_move(step_history[-1])
+        schedule_speculation()
     toString(faces)
     window.invalid = True  # 重绘窗口
 
@@ -1097,6 +1057,7 @@ def reset_cube():
     if is_solving:
         is_solving = False
         solution_steps = []
+    forget_solution()
     
     # 清空历史记录
     step_history = []
@@ -1126,6 +1087,7 @@ def test_solve():
     # 执行测试序列
     solution_steps = test_moves.copy()
     is_solving = True
+    begin_playback_tracking()
     
     # 执行第一个步骤
     pyglet.clock.schedule_once(execute_step, 0.5)
@@ -1141,8 +1103,8 @@ def print_step_info(step_number, move, remaining_steps=0):
         "U": "顶面顺时针",
         "U'": "顶面逆时针",
         "U2": "顶面旋转180度",
-        "D": "底面逆时针", 
-        "D'": "底面顺时针",
+        "D": "底面顺时针", 
+        "D'": "底面逆时针",
         "D2": "底面旋转180度",
         "L": "左面顺时针",
         "L'": "左面逆时针",
@@ -1204,6 +1166,40 @@ def generate_progress_bar(percent, length=30):
     bar = '█' * filled_length + '░' * (length - filled_length)
     return f"[{bar}]"
 
+# 后台求解完成后开始执行解法
+def start_solution_playback(steps):
+    global solution_steps, step_history, is_solving
+    if not steps:
+        print("无法求解当前魔方状态")
+        return
+    if not is_valid_solution(encode_cube(faces), steps):
+        # compute_solution只返回验证过的解法，这里防止其他来源的解法进入播放
+        print("解法无法还原当前魔方，不执行")
+        return
+    solution_steps = steps
+    step_history = []  # 清空历史记录
+    is_solving = True
+    remember_solution(steps)
+    begin_playback_tracking()
+    start_anytime_improvement(steps)
+    # 开始执行第一步，立即执行不等待
+    pyglet.clock.schedule_once(execute_step, 0.01)
+
+# 重新求解完成后继续执行
+def continue_solution_playback(steps):
+    global solution_steps, is_solving
+    if not is_solving:
+        return
+    if not steps or not is_valid_solution(encode_cube(faces), steps):
+        # 所有方法失败后，才停止求解
+        print("无法继续求解")
+        is_solving = False
+        return
+    solution_steps = steps
+    print(f"继续执行 {len(solution_steps)} 步")
+    # 立即执行第一步，不停顿
+    pyglet.clock.schedule_once(execute_step, 0.01)
+
 # 执行求解步骤
 def execute_step(dt):
     global faces, is_solving, solution_steps, step_history
@@ -1214,6 +1210,8 @@ def execute_step(dt):
         if move in MOVE_MAP:
             # 执行旋转操作
             MOVE_MAP[move](faces)
+            if playback_hash is not None:
+                playback_hash.turn(move)
             step_history.append(move)
             print(f"执行: {move}")
             window.invalid = True
@@ -1228,46 +1226,27 @@ def execute_step(dt):
         if is_init_state(faces):
             # 魔方已还原完成
             is_solving = False
+            remember_solution([])
             print("\n魔方已完全还原!")
             save_solution_to_file(step_history)
         elif is_solving:
             # 魔方尚未还原，但无需等待用户确认，直接计算新的解法并继续执行
+            # 如果回到了已经求解过的状态，说明自动求解陷入了回路
+            if playback_hash is not None:
+                if playback_hash.value in resolve_hashes:
+                    print("\n检测到魔方回到了之前求解过的状态，停止自动求解以避免死循环")
+                    is_solving = False
+                    return
+                resolve_hashes.add(playback_hash.value)
             print("\n继续求解魔方...")
             
-            try:
-                # 获取魔方当前状态
-                cube_str = encode_cube(faces)
-                
-                # 尝试使用kociemba求解当前状态
-                solution = kociemba.solve(cube_str)
-                print(f"新解法: {solution}")
-                
-                # 设置新的解法步骤
-                solution_steps = solution.split()
-                print(f"继续执行 {len(solution_steps)} 步")
-                
-                # 立即执行第一步，不停顿
-                pyglet.clock.schedule_once(execute_step, 0.01)
-            except Exception as e:
-                print(f"继续求解失败，尝试使用替代方法: {str(e)}")
-                try:
-                    # 尝试使用修复后的字符串
-                    fixed_str = fix_cube_string(cube_str)
-                    solution = kociemba.solve(fixed_str)
-                    print(f"使用修复后状态求解成功")
-                    solution_steps = solution.split()
-                    # 立即执行，不停顿
-                    pyglet.clock.schedule_once(execute_step, 0.01)
-                except Exception as e2:
-                    # 所有方法失败后，才停止求解
-                    print(f"无法继续求解: {str(e2)}")
-                    is_solving = False
+            # 获取魔方当前状态，在后台线程计算新的解法
+            submit_solve(encode_cube(faces), continue_solution_playback)
         else:
             # 不在求解过程中，无需操作
             pass
 
 # 显示3D魔方
-@window.event
 def on_draw():
     # 清除缓冲时添加深度缓冲清除
     glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
@@ -1493,7 +1472,29 @@ def draw_faces_data(scale_factor):
     status_y_pos = window_height * 0.95
     
     # 如果正在执行解法，显示当前步骤信息
-    if is_solving and solution_steps:
+    if solve_future is not None and not is_solving:
+        # 后台求解中，窗口照常刷新
+        status_bg = pyglet.shapes.Rectangle(
+            x=0, 
+            y=status_y_pos - window_height * 0.07, 
+            width=window_width, 
+            height=window_height * 0.07,
+            color=(0, 0, 100)
+        )
+        status_bg.opacity = 150
+        status_bg.draw()
+        
+        status_label = pyglet.text.Label(
+            "正在计算解法… (按Esc键取消)",
+            font_size=max(12, int(14 * scale_factor)),
+            x=window_width * 0.5,
+            y=status_y_pos - window_height * 0.035,
+            color=(255, 255, 0, 255),
+            anchor_x='center',
+            anchor_y='center'
+        )
+        status_label.draw()
+    elif is_solving and solution_steps:
         # 状态背景
         status_bg = pyglet.shapes.Rectangle(
             x=0, 
@@ -1637,8 +1638,8 @@ def display_current_move(move=None, scale_factor=1.0):
         "U": "顶面顺时针",
         "U'": "顶面逆时针",
         "U2": "顶面旋转180°",
-        "D": "底面逆时针", 
-        "D'": "底面顺时针",
+        "D": "底面顺时针", 
+        "D'": "底面逆时针",
         "D2": "底面旋转180°",
         "L": "左面顺时针",
         "L'": "左面逆时针",
@@ -1770,6 +1771,9 @@ def main():
     
     # 只有直接运行时才启动pyglet应用
     if __name__ == "__main__":
+        setup_gui()
+        # 启动时的魔方通常来自拍摄，先推测求解一次
+        schedule_speculation()
         pyglet.app.run()
 
 if __name__ == "__main__":
@@ -1783,10 +1787,12 @@ def reinitialize_cube():
     """从cube_data.py或main.py重新初始化魔方数据，模拟主程序启动行为"""
     global faces, step_history, is_solving, solution_steps
     
-    # 清除历史记录和状态
+    # 清除历史记录和状态；魔方会被整体替换，之前的解法和推测都不再可用
     step_history = []
     is_solving = False
     solution_steps = []
+    forget_solution()
+    stop_speculation()
     
     try:
         # 1. 首先尝试从main模块获取数据
@@ -1802,7 +1808,7 @@ def reinitialize_cube():
             
             if hasattr(main, 'faces'):
                 print("从main.py导入新的魔方状态...")
-                faces = main.faces
+                faces = FaceList().load(main.faces)
                 print("成功从main.py导入新魔方数据！")
                 return True
         except ImportError:
@@ -1818,7 +1824,7 @@ def reinitialize_cube():
                 import cube_data
             
             if hasattr(cube_data, 'faces'):
-                faces = cube_data.faces
+                faces = FaceList().load(cube_data.faces)
                 print("成功从cube_data.py导入新魔方数据！")
                 return True
             else:
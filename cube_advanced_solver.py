@@ -1,94 +1,26 @@
 # 高级魔方求解算法实现
 import numpy as np
 import copy as cp
+import time
 
-# 优化解法，移除冗余步骤
-def optimize_solution(steps):
-    """优化解法，移除冗余步骤"""
-    if not steps:
-        return steps
-    
-    # 步骤规则化字典
-    optimizations = {
-        # 消除反向操作: X X' = 空
-        "U U'": [], "U' U": [], 
-        "D D'": [], "D' D": [],
-        "L L'": [], "L' L": [],
-        "R R'": [], "R' R": [],
-        "F F'": [], "F' F": [],
-        "B B'": [], "B' B": [],
-        
-        # 合并相同操作: X X = X2
-        "U U": ["U2"], "U' U'": ["U2"],
-        "D D": ["D2"], "D' D'": ["D2"],
-        "L L": ["L2"], "L' L'": ["L2"],
-        "R R": ["R2"], "R' R'": ["R2"],
-        "F F": ["F2"], "F' F'": ["F2"],
-        "B B": ["B2"], "B' B'": ["B2"],
-        
-        # 消除三次相同操作: X X X = X'
-        "U U U": ["U'"], "U' U' U'": ["U"],
-        "D D D": ["D'"], "D' D' D'": ["D"],
-        "L L L": ["L'"], "L' L' L'": ["L"],
-        "R R R": ["R'"], "R' R' R'": ["R"],
-        "F F F": ["F'"], "F' F' F'": ["F"],
-        "B B B": ["B'"], "B' B' B'": ["B"],
-        
-        # 处理X2 X = X'和X X2 = X'
-        "U2 U": ["U'"], "U U2": ["U'"],
-        "U2 U'": ["U"], "U' U2": ["U"],
-        "D2 D": ["D'"], "D D2": ["D'"],
-        "D2 D'": ["D"], "D' D2": ["D"],
-        "L2 L": ["L'"], "L L2": ["L'"],
-        "L2 L'": ["L"], "L' L2": ["L"],
-        "R2 R": ["R'"], "R R2": ["R'"],
-        "R2 R'": ["R"], "R' R2": ["R"],
-        "F2 F": ["F'"], "F F2": ["F'"],
-        "F2 F'": ["F"], "F' F2": ["F"],
-        "B2 B": ["B'"], "B B2": ["B'"],
-        "B2 B'": ["B"], "B' B2": ["B"]
-    }
-    
-    # 首次规范化：将步骤转换为字符串列表
-    optimized = steps.copy()
-    
-    # 应用优化规则（固定次数以避免无限循环）
-    for _ in range(5):  # 应用5轮优化
-        changed = False
-        i = 0
-        while i < len(optimized) - 1:
-            # 检查当前步骤和下一个步骤是否可以优化
-            current_pair = f"{optimized[i]} {optimized[i+1]}"
-            if current_pair in optimizations:
-                # 替换为优化后的步骤
-                replacement = optimizations[current_pair]
-                optimized = optimized[:i] + replacement + optimized[i+2:]
-                changed = True
-            else:
-                i += 1
-        
-        # 如果这一轮没有变化，则停止优化
-        if not changed:
-            break
-    
-    # 三步优化（如果有三个连续相同的步骤）
-    i = 0
-    while i < len(optimized) - 2:
-        # 检查三个连续步骤
-        triple = f"{optimized[i]} {optimized[i+1]} {optimized[i+2]}"
-        triple_key = " ".join([optimized[i]] * 3)
-        if triple_key in optimizations:
-            # 替换为优化后的步骤
-            replacement = optimizations[triple_key]
-            optimized = optimized[:i] + replacement + optimized[i+3:]
-        else:
-            i += 1
-    
-    return optimized
+from cube_engine import simplify_moves
+from cube_optimal import OPTIMAL_BUDGET, PRACTICAL_DEPTH, databases_available, lower_bound, solve_optimal
+from cube_portfolio import EARLY_ACCEPT_LENGTH, PORTFOLIO_BUDGET, Strategy, kociemba_strategy, run_portfolio
+from cube_supervisor import SolveTimeout, remaining_time
+from cube_variants import VARIANT_BUDGET, solve_variants
 
 # 高级求解函数
-def solve_advanced(faces, encode_cube_func, is_init_state_func, solve_cube_func):
-    """使用高级二阶段算法求解魔方，步数少于标准算法"""
+def solve_advanced(faces, encode_cube_func, is_init_state_func, solve_cube_func, optimal=False, deadline=None,
+                   orientations=False):
+    """使用高级二阶段算法求解魔方，步数少于标准算法
+
+    optimal为True且已生成模式数据库时，同时运行IDA*最优解搜索，时限内搜完则采用最优解；
+    纯Python的搜索只能在时限内搜完不超过PRACTICAL_DEPTH（14）步左右的状态，
+    模式数据库给出的下界更大时不运行最优解搜索。
+    orientations为True时改为同时求解24个整体方向及其逆状态（见cube_variants），取最短的解法。
+    deadline为time.monotonic()的截止时间：求解进程到时即被结束，没有得到解法时返回SolveTimeout（空列表）。
+    """
+    start = time.monotonic()
     try:
         import kociemba
         has_kociemba = True
@@ -114,28 +46,38 @@ def solve_advanced(faces, encode_cube_func, is_init_state_func, solve_cube_func)
             # 尝试提供多种选项，选择最短的解法
             print("使用高级算法求解，正在尝试多种搜索参数...")
             
-            # 存储不同解法尝试的结果
             solutions = []
-            
-            try:
-                # 方法1: 标准二阶段算法，设置较大深度
-                print("尝试深度搜索算法...")
-                solution_deep = kociemba.solve(cube_str, 25)
-                steps_deep = solution_deep.split()
-                print(f"深度搜索算法步数: {len(steps_deep)}")
-                solutions.append((steps_deep, f"深度搜索算法 ({len(steps_deep)}步)"))
-            except Exception as e:
-                print(f"深度搜索算法失败: {str(e)}")
-            
-            try:
-                # 方法2: 使用最大深度
-                print("尝试最大深度搜索...")
-                solution_max = kociemba.solve(cube_str, 30)
-                steps_max = solution_max.split()
-                print(f"最大深度搜索步数: {len(steps_max)}")
-                solutions.append((steps_max, f"最大深度搜索 ({len(steps_max)}步)"))
-            except Exception as e:
-                print(f"最大深度搜索失败: {str(e)}")
+            if orientations:
+                # 24个方向 × {原状态, 逆状态} 同时求解，变体中已包含原方向，不再单独运行深度组合
+                budget = VARIANT_BUDGET
+                if deadline is not None:
+                    budget = min(budget, remaining_time(deadline))
+                steps, method_name = solve_variants(cube_str, budget=budget)
+                if steps is not None:
+                    solutions.append((steps, f"多方向求解 {method_name} ({len(steps)}步)"))
+            else:
+                # 深度搜索和最大深度搜索在两个进程中同时运行
+                strategies = [
+                    Strategy("深度搜索算法", kociemba_strategy, (25,)),
+                    Strategy("最大深度搜索", kociemba_strategy, (30,)),
+                ]
+                accept_length, budget = EARLY_ACCEPT_LENGTH, PORTFOLIO_BUDGET
+                if optimal and databases_available():
+                    # 最优解搜索14步时已需约9秒，下界更大时在时限内搜不完，只会多占一个CPU
+                    bound = lower_bound(cube_str)
+                    if bound <= PRACTICAL_DEPTH:
+                        # 最优解搜索耗时较长，不提前采用kociemba的结果
+                        strategies.append(Strategy("最优解搜索", solve_optimal, ()))
+                        accept_length, budget = None, OPTIMAL_BUDGET
+                    else:
+                        print(f"最优解至少{bound}步，超过最优解搜索的适用范围（{PRACTICAL_DEPTH}步），只使用kociemba")
+                elif optimal:
+                    print("未找到最优解模式数据库，请先运行 python cube_optimal.py build")
+                if deadline is not None:
+                    budget = min(budget, remaining_time(deadline))
+                steps, method_name = run_portfolio(cube_str, strategies, budget=budget, accept_length=accept_length)
+                if steps is not None:
+                    solutions.append((steps, f"{method_name} ({len(steps)}步)"))
 
             # 如果有可用的解法，选择步骤最少的
             if solutions:
@@ -147,7 +89,7 @@ def solve_advanced(faces, encode_cube_func, is_init_state_func, solve_cube_func)
                 print(f"解法步骤: {' '.join(best_solution)}")
                 
                 # 执行一些优化，去除冗余步骤
-                optimized_steps = optimize_solution(best_solution)
+                optimized_steps = simplify_moves(best_solution)
                 
                 if len(optimized_steps) < len(best_solution):
                     print(f"优化后步数: {len(optimized_steps)} (减少了 {len(best_solution) - len(optimized_steps)} 步)")
@@ -161,13 +103,22 @@ def solve_advanced(faces, encode_cube_func, is_init_state_func, solve_cube_func)
         except Exception as e:
             print(f"高级算法出错: {str(e)}")
     
+    if deadline is not None and remaining_time(deadline) == 0:
+        print("已到截止时间，停止求解")
+        return SolveTimeout(time.monotonic() - start, "solve_advanced")
+    
     # 如果高级算法失败，回退到标准的求解算法，但也应用优化
     print("使用标准算法求解...")
-    standard_solution = solve_cube_func(faces)
+    if deadline is not None:
+        standard_solution = solve_cube_func(faces, deadline=deadline)
+    else:
+        standard_solution = solve_cube_func(faces)
+    if isinstance(standard_solution, SolveTimeout):
+        return standard_solution
     
     # 应用优化到标准解法
     if standard_solution:
-        optimized_standard = optimize_solution(standard_solution)
+        optimized_standard = simplify_moves(standard_solution)
         print(f"标准算法步数: {len(standard_solution)}")
         if len(optimized_standard) < len(standard_solution):
             print(f"优化后标准算法步数: {len(optimized_standard)} (减少了 {len(standard_solution) - len(optimized_standard)} 步)")
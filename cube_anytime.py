@@ -0,0 +1,43 @@
+# 随时可用的求解：立即给出一个解，之后不断收紧深度上限，陆续给出更短的解
+import time
+
+from cube_cache import cached_solve
+from cube_portfolio import Strategy, is_valid_solution, kociemba_strategy, run_portfolio
+
+# 默认总时限（秒）
+ANYTIME_BUDGET = 3.0
+
+
+def solve_anytime(cube_str, budget=ANYTIME_BUDGET, target_length=None):
+    """生成器：依次产出越来越短的有效解（步骤列表）
+
+    第一个解来自默认深度的kociemba（通常只需几毫秒，命中缓存时更快）；
+    之后每轮把深度上限设为当前最好解的步数减一，在子进程中求解，
+    到达budget秒、解的步数不超过target_length或找不到更短的解时结束。
+    第一次求解失败时抛出与kociemba相同的异常。
+    """
+    deadline = time.monotonic() + budget
+    best = cached_solve(cube_str).split()
+    if not is_valid_solution(cube_str, best):
+        raise ValueError("求解结果无法还原魔方")
+    yield best
+    while best and (target_length is None or len(best) > target_length):
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return
+        depth = len(best) - 1
+        steps, _ = run_portfolio(
+            cube_str, [Strategy(f"Kociemba深度{depth}", kociemba_strategy, (depth,))], budget=remaining
+        )
+        if steps is None or len(steps) >= len(best):
+            return
+        best = steps
+        yield best
+
+
+def best_anytime_solution(cube_str, budget=ANYTIME_BUDGET, target_length=None):
+    """一直等到时限或目标步数，返回得到的最短解"""
+    best = None
+    for best in solve_anytime(cube_str, budget, target_length):
+        pass
+    return best
@@ -0,0 +1,86 @@
+# 多进程批量求解：一次求解大量kociemba字符串，每个工作进程只加载一次求解表
+import argparse
+import multiprocessing
+import os
+from collections import namedtuple
+
+import numpy as np
+
+from cube_cache import kociemba_solve, normalize_cube_string
+from cube_engine import to_kociemba
+from cube_validate import VALID, reason_message, validate_cube_string
+from cube_warmup import warmup
+
+# index为输入中的序号，solution为解法字符串，失败时solution为None、error为错误信息
+SolveResult = namedtuple("SolveResult", ["index", "cube", "solution", "error"])
+
+_max_depth = None
+
+
+def _init_worker(max_depth):
+    """工作进程初始化：先预热求解表，让第一条和之后的一样快"""
+    global _max_depth
+    _max_depth = max_depth
+    warmup()
+
+
+def _solve_item(item):
+    index, cube = item
+    try:
+        if not isinstance(cube, str):
+            cube = to_kociemba(np.asarray(cube).reshape(54))
+        reason = validate_cube_string(cube)
+        if reason != VALID:
+            return SolveResult(index, cube, None, f"InvalidCube: {reason_message(reason)}")
+        solution = kociemba_solve(normalize_cube_string(cube), _max_depth)
+        return SolveResult(index, cube, solution, None)
+    except Exception as e:
+        return SolveResult(index, cube, None, f"{type(e).__name__}: {e}")
+
+
+def solve_many(cubes, workers=None, ordered=True, max_depth=None, chunksize=64):
+    """批量求解，逐条返回SolveResult的生成器
+
+    cubes: kociemba字符串，或54个颜色值的数组（按cube.py的面顺序），可以是任意可迭代对象
+    workers: 工作进程数，默认为CPU核数；为1时在当前进程内求解
+    ordered: True时按输入顺序返回，False时谁先算完先返回（用index对应输入）
+    某一条求解失败只会让该条的error不为None，不会中断整个批次。
+    """
+    items = enumerate(cubes)
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers <= 1:
+        _init_worker(max_depth)
+        for item in items:
+            yield _solve_item(item)
+        return
+    with multiprocessing.Pool(workers, initializer=_init_worker, initargs=(max_depth,)) as pool:
+        mapper = pool.imap if ordered else pool.imap_unordered
+        yield from mapper(_solve_item, items, chunksize)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="多进程批量求解kociemba字符串")
+    parser.add_argument("input", help="输入文件，每行一个54字符状态")
+    parser.add_argument("output", help="输出文件，每行为“状态 解法”，失败的行为“状态 ERROR 错误信息”")
+    parser.add_argument("--workers", type=int, default=None, help="工作进程数，默认CPU核数")
+    parser.add_argument("--max-depth", type=int, default=None, help="kociemba最大搜索深度")
+    parser.add_argument("--unordered", action="store_true", help="按完成顺序输出")
+    args = parser.parse_args()
+
+    solved = failed = 0
+    with open(args.input, "r", encoding="utf-8") as f, open(args.output, "w", encoding="utf-8") as out:
+        cubes = (line.strip() for line in f if line.strip())
+        for result in solve_many(cubes, workers=args.workers, ordered=not args.unordered,
+                                 max_depth=args.max_depth):
+            if result.error is None:
+                solved += 1
+                out.write(f"{result.cube} {result.solution}\n")
+            else:
+                failed += 1
+                out.write(f"{result.cube} ERROR {result.error}\n")
+    print(f"批量求解完成: 成功 {solved} 条，失败 {failed} 条")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+# 两级解法缓存：内存LRU + sqlite持久化，同一状态不必重复调用kociemba
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+
+from cube_engine import from_kociemba, to_kociemba
+from cube_symmetry import canonical_symmetry, conjugate_moves
+
+# 默认缓存文件，和解法文件一样放在当前目录
+SOLUTION_CACHE_PATH = "cube_solution_cache.db"
+# 内存中最多保留的解法条数，超出后淘汰最久未使用的
+MEMORY_CACHE_SIZE = 4096
+
+_CENTER_INDICES = (4, 13, 22, 31, 40, 49)
+
+
+def normalize_cube_string(cube_str):
+    """按中心块把54字符状态换成标准URFDLB字母
+
+    与fix_cube_string的规则相同：颜色只由所在面的中心决定，
+    所以不同配色、不同字母表示的同一状态得到同一个键，解法也相同。
+    """
+    if len(cube_str) != 54:
+        raise ValueError(f"魔方字符串长度必须为54，当前长度为{len(cube_str)}")
+    centers = [cube_str[i] for i in _CENTER_INDICES]
+    if len(set(centers)) != 6:
+        # 中心块有重复时无法换色，原样作为键
+        return cube_str
+    return cube_str.translate(str.maketrans(dict(zip(centers, "URFDLB"))))
+
+
+def kociemba_solve(cube_str, max_depth=None):
+    """调用kociemba.solve；没有安装kociemba时改用仓库内的cube_twophase，max_depth为最大步数"""
+    try:
+        import kociemba
+    except ImportError:
+        import cube_twophase
+        return cube_twophase.solve(cube_str, max_depth or cube_twophase.MAX_LENGTH)
+    if max_depth is None:
+        return kociemba.solve(cube_str)
+    return kociemba.solve(cube_str, max_depth=max_depth)
+
+
+class SolutionCache:
+    """键为 (标准化状态串, 最大深度) 的两级解法缓存
+
+    第一级是OrderedDict实现的LRU，命中只需一次字典查找；
+    第二级是sqlite文件，程序重启后仍然有效。path为None时只用内存。
+    """
+
+    def __init__(self, path=SOLUTION_CACHE_PATH, size=MEMORY_CACHE_SIZE):
+        self.size = size
+        self.path = path
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        if path is not None:
+            try:
+                self._db = sqlite3.connect(path, check_same_thread=False)
+                self._db.execute(
+                    "CREATE TABLE IF NOT EXISTS solutions ("
+                    "cube TEXT NOT NULL, depth INTEGER NOT NULL, solution TEXT NOT NULL, "
+                    "PRIMARY KEY (cube, depth))"
+                )
+                self._db.commit()
+            except sqlite3.Error as e:
+                print(f"无法打开解法缓存文件 {path}: {str(e)}，只使用内存缓存")
+                self._db = None
+
+    def _remember(self, key, solution):
+        memory = self._memory
+        memory[key] = solution
+        memory.move_to_end(key)
+        while len(memory) > self.size:
+            memory.popitem(last=False)
+
+    def get(self, cube_str, max_depth=None):
+        """查找缓存，未命中返回None"""
+        key = (normalize_cube_string(cube_str), max_depth or 0)
+        with self._lock:
+            solution = self._memory.get(key)
+            if solution is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return solution
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT solution FROM solutions WHERE cube = ? AND depth = ?", key
+                ).fetchone()
+                if row is not None:
+                    self._remember(key, row[0])
+                    self.disk_hits += 1
+                    return row[0]
+            self.misses += 1
+            return None
+
+    def put(self, cube_str, solution, max_depth=None):
+        """写入一条解法，同时写入内存和磁盘"""
+        key = (normalize_cube_string(cube_str), max_depth or 0)
+        with self._lock:
+            self._remember(key, solution)
+            if self._db is not None:
+                try:
+                    self._db.execute(
+                        "INSERT OR REPLACE INTO solutions (cube, depth, solution) VALUES (?, ?, ?)",
+                        (*key, solution),
+                    )
+                    self._db.commit()
+                except sqlite3.Error as e:
+                    print(f"写入解法缓存失败: {str(e)}")
+
+    def solve(self, cube_str, max_depth=None):
+        """带缓存的kociemba.solve，返回解法字符串；求解失败时抛出与kociemba相同的异常"""
+        solution = self.get(cube_str, max_depth)
+        if solution is not None:
+            return solution
+        normalized = normalize_cube_string(cube_str)
+        solution = kociemba_solve(normalized, max_depth)
+        self.put(normalized, solution, max_depth)
+        return solution
+
+    def clear(self):
+        """清空内存和磁盘上的全部缓存"""
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM solutions")
+                self._db.commit()
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+
+class SymmetrySolutionCache(SolutionCache):
+    """按对称类折叠的解法缓存
+
+    同一个打乱状态因为拿魔方的姿势不同，会以不同的整体朝向被识别出来。
+    这里先把状态换成48个对称（含镜像）下的标准形式，缓存只存标准形式的解法，
+    命中后再把解法共轭回查询时的朝向，因此同样的缓存条数最多能覆盖48倍的状态。
+    """
+
+    def __init__(self, path=SOLUTION_CACHE_PATH, size=MEMORY_CACHE_SIZE, mirrors=True):
+        super().__init__(path, size)
+        self.mirrors = mirrors
+
+    def _fold(self, cube_str):
+        """返回 (标准形式字符串, 对称下标)；颜色无法按中心归一化时返回None"""
+        centers = set(cube_str[i] for i in _CENTER_INDICES) if len(cube_str) == 54 else ()
+        if len(centers) != 6 or not set(cube_str) <= centers:
+            return None
+        canonical, symmetry = canonical_symmetry(from_kociemba(cube_str), self.mirrors)
+        return to_kociemba(canonical), symmetry
+
+    def get(self, cube_str, max_depth=None):
+        folded = self._fold(cube_str)
+        if folded is None:
+            return super().get(cube_str, max_depth)
+        canonical, symmetry = folded
+        solution = super().get(canonical, max_depth)
+        if solution is None or symmetry == 0:
+            return solution
+        return " ".join(conjugate_moves(solution, symmetry))
+
+    def put(self, cube_str, solution, max_depth=None):
+        folded = self._fold(cube_str)
+        if folded is None:
+            # 颜色无法按中心归一化时按原样存储
+            return super().put(cube_str, solution, max_depth)
+        canonical, symmetry = folded
+        if symmetry != 0:
+            solution = " ".join(conjugate_moves(solution, symmetry, inverse=True))
+        super().put(canonical, solution, max_depth)
+
+
+_default_cache = None
+
+
+def get_solution_cache():
+    """进程内共享的默认缓存，首次使用时打开；设置环境变量CUBE_SOLUTION_CACHE=""可关闭磁盘缓存"""
+    global _default_cache
+    if _default_cache is None:
+        path = os.environ.get("CUBE_SOLUTION_CACHE", SOLUTION_CACHE_PATH) or None
+        _default_cache = SymmetrySolutionCache(path)
+    return _default_cache
+
+
+def cached_solve(cube_str, max_depth=None):
+    """使用默认缓存求解，max_depth对应kociemba.solve的max_depth参数"""
+    return get_solution_cache().solve(cube_str, max_depth)
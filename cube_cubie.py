@@ -0,0 +1,350 @@
+# 角块/棱块坐标表示：与cube_engine的54贴纸状态无损互转，并提供坐标转动表
+from collections import namedtuple
+from functools import lru_cache
+from itertools import combinations
+from math import factorial
+
+import numpy as np
+
+from cube_engine import FACE_NAMES, MOVE_NAMES, MOVE_TABLE, SOLVED_STATE
+
+"""cubie:
+8个角块位置 URF UFL ULB UBR DFR DLF DBL DRB
+12个棱块位置 UR UF UL UB DR DF DL DB FR FL BL BR
+cp[i]/ep[i]：位置i上是哪一个角块/棱块
+co[i]：角块的U/D色贴纸相对位置i的第一个贴纸顺时针转了几次（0~2）
+eo[i]：棱块是否翻转（0/1）
+centers：六个中心块的颜色值，用于无损还原原来的颜色编号
+"""
+
+CORNER_NAMES = ["URF", "UFL", "ULB", "UBR", "DFR", "DLF", "DBL", "DRB"]
+EDGE_NAMES = ["UR", "UF", "UL", "UB", "DR", "DF", "DL", "DB", "FR", "FL", "BL", "BR"]
+
+
+def _facelets(names):
+    """把 "U9 R1 F3" 转换为贴纸下标（面 + 面内1~9的编号）"""
+    return [9 * FACE_NAMES.index(n[0]) + int(n[1]) - 1 for n in names.split()]
+
+
+# 每个位置的贴纸下标，按顺时针顺序，U/D面贴纸在前
+CORNER_FACELETS = np.array([_facelets(s) for s in (
+    "U9 R1 F3", "U7 F1 L3", "U1 L1 B3", "U3 B1 R3",
+    "D3 F9 R7", "D1 L9 F7", "D7 B9 L7", "D9 R9 B7",
+)], dtype=np.intp)
+EDGE_FACELETS = np.array([_facelets(s) for s in (
+    "U6 R2", "U8 F2", "U4 L2", "U2 B2", "D6 R8", "D2 F8",
+    "D4 L8", "D8 B8", "F6 R4", "F4 L6", "B6 L4", "B4 R6",
+)], dtype=np.intp)
+
+# 每个角块/棱块各贴纸所属的面
+CORNER_COLORS = np.array([[FACE_NAMES.index(c) for c in name] for name in CORNER_NAMES], dtype=np.intp)
+EDGE_COLORS = np.array([[FACE_NAMES.index(c) for c in name] for name in EDGE_NAMES], dtype=np.intp)
+
+# 颜色查找表，下标6表示无法识别的颜色；查不到时为-1
+_CORNER_LOOKUP = np.full((7, 7, 7), -1, dtype=np.int8)
+for _j, (_a, _b, _c) in enumerate(CORNER_COLORS):
+    _CORNER_LOOKUP[_a, _b, _c] = _j
+_EDGE_LOOKUP = np.full((7, 7), -1, dtype=np.int8)
+for _j, (_a, _b) in enumerate(EDGE_COLORS):
+    _EDGE_LOOKUP[_a, _b] = 2 * _j
+    _EDGE_LOOKUP[_b, _a] = 2 * _j + 1
+
+Cubie = namedtuple("Cubie", ["cp", "co", "ep", "eo", "centers"])
+
+
+def state_to_cubie(states):
+    """把 (54,) 或 (N, 54) 贴纸状态转换为角块/棱块表示
+
+    颜色按中心块归属到面，因此任意配色方案都可以转换。
+    无法识别的角块/棱块在cp/ep中记为-1（co/eo无意义），可据此判断扫描错误。
+    """
+    states = np.asarray(states)
+    single = states.ndim == 1
+    states = np.atleast_2d(states)
+    n = len(states)
+    rows = np.arange(n)[:, None]
+
+    # 颜色值 -> 面下标
+    centers = states[:, 4::9]
+    lookup = np.full((n, 256), 6, dtype=np.intp)
+    lookup[rows, centers] = np.arange(6)
+    face = lookup[rows, states]
+
+    corner = face[:, CORNER_FACELETS]
+    is_ud = corner <= 1
+    co = is_ud.argmax(axis=2)
+    turned = np.take_along_axis(corner, (co[:, :, None] + np.arange(3)) % 3, axis=2)
+    cp = _CORNER_LOOKUP[turned[:, :, 0], turned[:, :, 1], turned[:, :, 2]]
+    cp[is_ud.sum(axis=2) != 1] = -1
+
+    edge = face[:, EDGE_FACELETS]
+    code = _EDGE_LOOKUP[edge[:, :, 0], edge[:, :, 1]]
+    ep = np.where(code >= 0, code >> 1, -1).astype(np.int8)
+    eo = (code & 1).astype(np.int8)
+
+    cubie = Cubie(cp, co.astype(np.int8), ep, eo, centers.copy())
+    if single:
+        cubie = Cubie(*(a[0] for a in cubie))
+    return cubie
+
+
+def cubie_to_state(cubie):
+    """把角块/棱块表示还原为贴纸状态，是state_to_cubie的逆变换"""
+    cp, co, ep, eo, centers = (np.asarray(a) for a in cubie)
+    single = cp.ndim == 1
+    cp, co, ep, eo, centers = (np.atleast_2d(a) for a in (cp, co, ep, eo, centers))
+    n = len(cp)
+    rows = np.arange(n)[:, None]
+
+    face = np.empty((n, 54), dtype=np.intp)
+    face[:, 4::9] = np.arange(6)
+    for k in range(3):
+        face[rows, CORNER_FACELETS[np.arange(8), (k + co) % 3]] = CORNER_COLORS[cp, k]
+    for k in range(2):
+        face[rows, EDGE_FACELETS[np.arange(12), (k + eo) % 2]] = EDGE_COLORS[ep, k]
+    states = np.take_along_axis(centers.astype(np.uint8), face, axis=1)
+    return states[0] if single else states
+
+
+def multiply(a, b):
+    """角块/棱块乘法：先执行a再执行b，centers沿用a"""
+    cp = np.take_along_axis(a.cp, np.broadcast_to(b.cp, a.cp.shape), axis=-1)
+    co = (np.take_along_axis(a.co, np.broadcast_to(b.cp, a.co.shape), axis=-1) + b.co) % 3
+    ep = np.take_along_axis(a.ep, np.broadcast_to(b.ep, a.ep.shape), axis=-1)
+    eo = (np.take_along_axis(a.eo, np.broadcast_to(b.ep, a.eo.shape), axis=-1) + b.eo) % 2
+    return Cubie(cp, co.astype(np.int8), ep, eo.astype(np.int8), a.centers)
+
+
+def inverse(a):
+    """逆变换：multiply(a, inverse(a)) 为还原状态；解法M还原inverse(a)时，M的逆序列还原a"""
+    cp = np.argsort(a.cp, axis=-1)
+    co = -np.take_along_axis(a.co, cp, axis=-1) % 3
+    ep = np.argsort(a.ep, axis=-1)
+    eo = np.take_along_axis(a.eo, ep, axis=-1) % 2
+    return Cubie(cp, co.astype(np.int8), ep, eo.astype(np.int8), a.centers)
+
+
+# 18种转动各自对应的角块/棱块变换，由贴纸置换表直接得到
+MOVE_CUBIES = [
+    Cubie(*(a[i] for a in state_to_cubie(SOLVED_STATE[MOVE_TABLE])))
+    for i in range(len(MOVE_NAMES))
+]
+
+
+# ---------------- 坐标：每个坐标都是一个小整数，支持 (N, ·) 批量计算 ----------------
+
+def permutation_parity(perm):
+    """排列的奇偶性（0为偶，1为奇）"""
+    perm = np.asarray(perm)
+    later = np.triu(np.ones((perm.shape[-1],) * 2, dtype=bool), 1)
+    inversions = (perm[..., :, None] > perm[..., None, :]) & later
+    return inversions.sum(axis=(-2, -1)) % 2
+
+
+def permutation_rank(perm):
+    """排列的Lehmer编码，0 ~ n!-1"""
+    perm = np.asarray(perm)
+    n = perm.shape[-1]
+    later = np.triu(np.ones((n, n), dtype=bool), 1)
+    digits = ((perm[..., :, None] > perm[..., None, :]) & later).sum(axis=-1)
+    weights = np.array([factorial(n - 1 - i) for i in range(n)], dtype=np.int64)
+    return digits @ weights
+
+
+def permutation_unrank(rank, n):
+    """permutation_rank的逆变换，返回 (N, n) 排列"""
+    rank = np.atleast_1d(np.asarray(rank, dtype=np.int64)).copy()
+    available = np.tile(np.arange(n), (len(rank), 1))
+    perm = np.empty((len(rank), n), dtype=np.int8)
+    rows = np.arange(len(rank))
+    for i in range(n):
+        digit, rank = np.divmod(rank, factorial(n - 1 - i))
+        perm[:, i] = available[rows, digit]
+        # 删去已使用的元素
+        keep = np.arange(n - i - 1)
+        keep = keep + (keep >= digit[:, None])
+        available = available[rows[:, None], keep]
+    return perm
+
+
+def get_twist(co):
+    """角块方向坐标 0 ~ 2186（最后一个角块由前7个决定）"""
+    return np.asarray(co)[..., :7].astype(np.int64) @ (3 ** np.arange(6, -1, -1))
+
+
+def set_twist(twist):
+    twist = np.atleast_1d(np.asarray(twist, dtype=np.int64))
+    co = (twist[:, None] // 3 ** np.arange(6, -1, -1)) % 3
+    last = (-co.sum(axis=1)) % 3
+    return np.column_stack([co, last]).astype(np.int8)
+
+
+def get_flip(eo):
+    """棱块方向坐标 0 ~ 2047（最后一个棱块由前11个决定）"""
+    return np.asarray(eo)[..., :11].astype(np.int64) @ (2 ** np.arange(10, -1, -1))
+
+
+def set_flip(flip):
+    flip = np.atleast_1d(np.asarray(flip, dtype=np.int64))
+    eo = (flip[:, None] >> np.arange(10, -1, -1)) & 1
+    last = eo.sum(axis=1) % 2
+    return np.column_stack([eo, last]).astype(np.int8)
+
+
+# 四个一组的棱块：U层 UR UF UL UB、D层 DR DF DL DB、中层 FR FL BL BR
+U_EDGES = (0, 1, 2, 3)
+D_EDGES = (4, 5, 6, 7)
+SLICE_EDGES = (8, 9, 10, 11)
+
+def _binomial_table(rows, columns):
+    """组合数表 table[p, j] = C(p, j)，按杨辉三角递推（math.comb要Python 3.8以上）"""
+    table = np.zeros((rows, columns), dtype=np.int64)
+    table[:, 0] = 1
+    for p in range(1, rows):
+        table[p, 1:] = table[p - 1, 1:] + table[p - 1, :-1]
+    return table
+
+
+_COMB = _binomial_table(12, 5)
+
+
+def _combination_rank(occupied):
+    """12个位置中选4个的组合编号 0 ~ 494，按 11-位置 的组合数系统编码"""
+    # 按位置从大到小依次为第k个棱块，贡献C(11-位置, k)
+    reversed_occupied = occupied[..., ::-1]
+    k = np.cumsum(reversed_occupied, axis=-1)
+    return np.where(reversed_occupied, _COMB[np.arange(12), np.minimum(k, 4)], 0).sum(axis=-1)
+
+
+# 组合编号 -> 四个位置（从小到大）
+_GROUP_POSITIONS = np.array(list(combinations(range(12), 4)), dtype=np.intp)
+_GROUP_MASKS = np.zeros((len(_GROUP_POSITIONS), 12), dtype=bool)
+_GROUP_MASKS[np.arange(len(_GROUP_POSITIONS))[:, None], _GROUP_POSITIONS] = True
+_order = np.argsort(_combination_rank(_GROUP_MASKS))
+_GROUP_POSITIONS, _GROUP_MASKS = _GROUP_POSITIONS[_order], _GROUP_MASKS[_order]
+del _order
+
+
+def _get_edge_group(ep, group):
+    """四个棱块的坐标 0 ~ 11879 = 位置组合(0~494) * 24 + 四个棱块的排列
+
+    中层棱块已还原时为0。
+    """
+    ep = np.asarray(ep)
+    occupied = (ep >= group[0]) & (ep <= group[-1])
+    order = ep[occupied].reshape(ep.shape[:-1] + (4,)) - group[0]
+    return _combination_rank(occupied) * 24 + permutation_rank(order)
+
+
+def _set_edge_group(value, group):
+    """返回只确定这四个棱块位置的ep，其余位置依次填入其他棱块"""
+    value = np.atleast_1d(np.asarray(value, dtype=np.int64))
+    combination, order = np.divmod(value, 24)
+    rows = np.arange(len(value))[:, None]
+    ep = np.empty((len(value), 12), dtype=np.int8)
+    ep[rows, _GROUP_POSITIONS[combination]] = permutation_unrank(order, 4) + group[0]
+    # 稳定排序后前8个即为未被选中的位置（从小到大）
+    rest = np.argsort(_GROUP_MASKS[combination], axis=1, kind="stable")[:, :8]
+    ep[rows, rest] = [e for e in range(12) if e not in group]
+    return ep
+
+
+def get_slice_sorted(ep):
+    """中层棱块坐标，已还原时为0"""
+    return _get_edge_group(ep, SLICE_EDGES)
+
+
+def set_slice_sorted(value):
+    return _set_edge_group(value, SLICE_EDGES)
+
+
+def get_u_edges(ep):
+    """U层棱块坐标"""
+    return _get_edge_group(ep, U_EDGES)
+
+
+def set_u_edges(value):
+    return _set_edge_group(value, U_EDGES)
+
+
+def get_d_edges(ep):
+    """D层棱块坐标"""
+    return _get_edge_group(ep, D_EDGES)
+
+
+def set_d_edges(value):
+    return _set_edge_group(value, D_EDGES)
+
+
+def get_corners(cp):
+    """角块排列坐标 0 ~ 40319"""
+    return permutation_rank(cp)
+
+
+def set_corners(value):
+    return permutation_unrank(value, 8)
+
+
+def get_ud_edges(ep):
+    """U、D层8个棱块的排列坐标 0 ~ 40319，只在中层棱块都位于中层时有意义（二阶段算法的第二阶段）"""
+    return permutation_rank(np.asarray(ep)[..., :8])
+
+
+def set_ud_edges(value):
+    perm = permutation_unrank(value, 8)
+    return np.column_stack([perm, np.tile(np.array(SLICE_EDGES, dtype=np.int8), (len(perm), 1))])
+
+
+def get_edges(ep):
+    """棱块排列坐标 0 ~ 12!-1，取值太大不建转动表，用于哈希和奇偶校验"""
+    return permutation_rank(ep)
+
+
+def coordinates(states):
+    """计算状态的各个坐标，返回字典，支持 (54,) 或 (N, 54) 输入"""
+    cubie = state_to_cubie(states)
+    return {
+        "twist": get_twist(cubie.co),
+        "flip": get_flip(cubie.eo),
+        "slice_sorted": get_slice_sorted(cubie.ep),
+        "u_edges": get_u_edges(cubie.ep),
+        "d_edges": get_d_edges(cubie.ep),
+        "corners": get_corners(cubie.cp),
+        "edges": get_edges(cubie.ep),
+    }
+
+
+# ---------------- 坐标转动表 ----------------
+
+# 坐标名称 -> (取值个数, 解码函数, 编码函数, 作用的部件)
+_COORDINATES = {
+    "twist": (2187, set_twist, get_twist, "co"),
+    "flip": (2048, set_flip, get_flip, "eo"),
+    "slice_sorted": (11880, set_slice_sorted, get_slice_sorted, "ep"),
+    "u_edges": (11880, set_u_edges, get_u_edges, "ep"),
+    "d_edges": (11880, set_d_edges, get_d_edges, "ep"),
+    "corners": (40320, set_corners, get_corners, "cp"),
+    # 只有U、D、R2、L2、F2、B2这10个转动的结果有意义
+    "ud_edges": (40320, set_ud_edges, get_ud_edges, "ep"),
+}
+
+
+@lru_cache(maxsize=None)
+def move_table(name):
+    """返回坐标转动表，形状 (取值个数, 18)，table[x, m] 为坐标x执行转动m后的坐标
+
+    首次调用时用NumPy批量构造并缓存，uint16存储。
+    """
+    size, decode, encode, part = _COORDINATES[name]
+    values = decode(np.arange(size))
+    table = np.empty((size, len(MOVE_NAMES)), dtype=np.uint16)
+    for m, move in enumerate(MOVE_CUBIES):
+        # 与multiply相同，但只计算这个坐标用到的部分
+        moved = values[:, move.cp if part in ("cp", "co") else move.ep]
+        if part == "co":
+            moved = (moved + move.co) % 3
+        elif part == "eo":
+            moved = (moved + move.eo) % 2
+        table[:, m] = encode(moved)
+    table.flags.writeable = False
+    return table
@@ -0,0 +1,410 @@
+# 本地求解守护进程：常驻内存保持求解表和解法缓存，每次启动cube.py/main.py不必重新加载
+#
+# 协议为JSON lines：客户端每行发送一个JSON对象，服务端每行回复一个JSON对象。
+#   {"cube": "<54字符>", "max_depth": null, "timeout": 10.0}
+#       ->  {"solution": "R U ...", "error": null, "cached": false, "timed_out": false}
+#   {"op": "ping"}                           ->  {"ok": true, "pid": 1234}
+#   {"op": "stats"}                          ->  {"requests": ..., "coalesced": ..., ...}
+#   {"op": "stop"}                           ->  {"ok": true}，回复后守护进程退出
+# 同一状态的并发请求只求解一次；不同状态的并发请求分给多个受监管的工作进程同时求解，
+# 超过请求的时限（没有给出时为DAEMON_SOLVE_TIMEOUT）就结束该工作进程并重新启动一个。
+# 有AF_UNIX时使用Unix socket，否则使用127.0.0.1上的TCP端口。
+#
+# 启动：python cube_daemon.py serve；停止：python cube_daemon.py stop。
+# 连续DAEMON_IDLE_TIMEOUT秒没有请求时守护进程自动退出。客户端在守护进程不可用时自动回退到本进程求解。
+import argparse
+import json
+import os
+import queue
+import signal
+import socket
+import socketserver
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeout
+
+from cube_cache import get_solution_cache, kociemba_solve, normalize_cube_string
+from cube_supervisor import DeadlineExceeded, SolveSupervisor, deadline_after, remaining_time, supervised_solve
+from cube_validate import VALID, reason_message, validate_cube_string
+from cube_warmup import warmup
+
+try:
+    import fcntl
+except ImportError:
+    # Windows上用msvcrt给锁文件加锁
+    fcntl = None
+    import msvcrt
+
+USE_UNIX_SOCKET = hasattr(socket, "AF_UNIX")
+DAEMON_SOCKET = os.environ.get(
+    "CUBE_DAEMON_SOCKET",
+    os.path.join(tempfile.gettempdir(), f"cube_solve_daemon_{os.getuid() if hasattr(os, 'getuid') else 0}.sock"),
+)
+DAEMON_PORT = int(os.environ.get("CUBE_DAEMON_PORT", "47654"))
+# 守护进程从启动到退出一直持有这个文件的独占锁，同一时间只能有一个守护进程
+DAEMON_LOCK = (DAEMON_SOCKET if USE_UNIX_SOCKET else
+               os.path.join(tempfile.gettempdir(), f"cube_solve_daemon_{DAEMON_PORT}")) + ".lock"
+# 连接守护进程的时限（秒），本机连接通常不到1毫秒
+CONNECT_TIMEOUT = 0.5
+# 请求没有给出时限时，守护进程最多为它求解多久（秒）
+DAEMON_SOLVE_TIMEOUT = 60.0
+# 连续这么多秒没有收到请求（也没有正在进行的求解）时守护进程自动退出，None表示一直运行
+DAEMON_IDLE_TIMEOUT = 600.0
+
+
+class DaemonUnavailable(ConnectionError):
+    """没有正在运行的求解守护进程"""
+
+
+# ---------------- 服务端 ----------------
+
+class SolveDaemon:
+    """守护进程的求解逻辑：查缓存、合并相同的请求、把求解分给受监管的工作进程"""
+
+    def __init__(self, workers=None):
+        # 先在主进程预热，fork出的工作进程直接继承已加载的表
+        warmup()
+        self.cache = get_solution_cache()
+        self._idle = queue.Queue()
+        self._supervisors = [SolveSupervisor() for _ in range(workers or os.cpu_count() or 1)]
+        for supervisor in self._supervisors:
+            # 提前启动工作进程
+            supervisor.call(warmup)
+            self._idle.put(supervisor)
+        self._lock = threading.Lock()
+        self._inflight = {}
+        self.stop_requested = threading.Event()
+        self.last_request = time.monotonic()
+        self.requests = self.cache_hits = self.coalesced = self.solved = self.failed = self.timeouts = 0
+
+    def solve(self, cube_str, max_depth=None, timeout=None):
+        """返回 (解法字符串, 是否来自缓存)
+
+        timeout为本次请求的时限（秒），None时为DAEMON_SOLVE_TIMEOUT；
+        状态无效或求解失败时抛出ValueError，超时抛出DeadlineExceeded。
+        """
+        deadline = deadline_after(DAEMON_SOLVE_TIMEOUT if timeout is None else timeout)
+        with self._lock:
+            self.requests += 1
+        reason = validate_cube_string(cube_str)
+        if reason != VALID:
+            raise ValueError(reason_message(reason))
+        solution = self.cache.get(cube_str, max_depth)
+        if solution is not None:
+            with self._lock:
+                self.cache_hits += 1
+            return solution, True
+        normalized = normalize_cube_string(cube_str)
+        key = (normalized, max_depth or 0)
+        with self._lock:
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = self._inflight[key] = Future()
+            else:
+                self.coalesced += 1
+        if owner:
+            solution = error = None
+            try:
+                solution = self._call(normalized, max_depth, deadline)
+            except Exception as e:
+                error = e
+            finally:
+                self._finish(key, future, solution, error)
+        # 键是按中心换色后的状态，键相同的请求解法也完全相同；
+        # 合并的请求各自按自己的时限等待，求解超时的结果（DeadlineExceeded）对它们同样适用
+        try:
+            return future.result(timeout=remaining_time(deadline)), False
+        except DeadlineExceeded:
+            raise
+        except FutureTimeout:
+            raise DeadlineExceeded("求解未在截止时间前完成") from None
+
+    def _call(self, normalized, max_depth, deadline):
+        """取一个空闲的工作进程求解；超时时监管器结束并重启该进程"""
+        try:
+            supervisor = self._idle.get(timeout=remaining_time(deadline))
+        except queue.Empty:
+            raise DeadlineExceeded("截止时间前没有空闲的求解进程") from None
+        try:
+            return supervisor.call(kociemba_solve, (normalized, max_depth), deadline)
+        finally:
+            self._idle.put(supervisor)
+
+    def _finish(self, key, future, solution, error):
+        """记录结果并唤醒所有等待该状态的请求；写缓存失败也一定会设置future"""
+        normalized, depth = key
+        if solution is None and error is None:
+            # 求解线程被KeyboardInterrupt等打断
+            error = RuntimeError("求解被中断")
+        try:
+            if solution is not None:
+                self.cache.put(normalized, solution, depth or None)
+        except Exception as e:
+            print(f"写入解法缓存失败: {e}", flush=True)
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+                if error is None:
+                    self.solved += 1
+                elif isinstance(error, DeadlineExceeded):
+                    self.timeouts += 1
+                else:
+                    self.failed += 1
+            if error is None:
+                future.set_result(solution)
+            elif isinstance(error, DeadlineExceeded):
+                future.set_exception(error)
+            else:
+                future.set_exception(ValueError(str(error)))
+
+    def handle(self, request):
+        """处理一条请求，返回回复对象"""
+        self.last_request = time.monotonic()
+        op = request.get("op", "solve")
+        if op == "stop":
+            self.stop_requested.set()
+            return {"ok": True}
+        if op == "ping":
+            return {"ok": True, "pid": os.getpid()}
+        if op == "stats":
+            with self._lock:
+                return {"requests": self.requests, "cache_hits": self.cache_hits,
+                        "coalesced": self.coalesced, "solved": self.solved, "failed": self.failed,
+                        "timeouts": self.timeouts, "inflight": len(self._inflight)}
+        if op != "solve":
+            return {"error": f"未知的操作: {op}"}
+        try:
+            solution, cached = self.solve(request["cube"], request.get("max_depth"), request.get("timeout"))
+            return {"solution": solution, "error": None, "cached": cached, "timed_out": False}
+        except DeadlineExceeded as e:
+            return {"solution": None, "error": str(e), "cached": False, "timed_out": True}
+        except Exception as e:
+            return {"solution": None, "error": f"{type(e).__name__}: {e}", "cached": False, "timed_out": False}
+
+    def idle_for(self):
+        """距离上一次请求过了多少秒；有正在进行的求解时返回0"""
+        with self._lock:
+            if self._inflight:
+                return 0.0
+        return time.monotonic() - self.last_request
+
+    def close(self):
+        for supervisor in self._supervisors:
+            supervisor.close()
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            try:
+                request = json.loads(line)
+                response = self.server.solve_daemon.handle(request)
+                if "id" in request:
+                    response["id"] = request["id"]
+            except ValueError as e:
+                response = {"error": f"请求格式错误: {e}"}
+            self.wfile.write((json.dumps(response, ensure_ascii=False) + "\n").encode("utf-8"))
+            self.wfile.flush()
+
+
+def _acquire_lock():
+    """取得守护进程的独占锁，返回需要一直保持打开的锁文件；锁已被其他守护进程持有时返回None"""
+    lock_file = open(DAEMON_LOCK, "a+")
+    try:
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_NBLCK, 1)
+    except OSError:
+        lock_file.close()
+        return None
+    return lock_file
+
+
+def _watch(server, daemon, idle_timeout):
+    """收到stop请求或空闲超过idle_timeout秒时让serve_forever返回"""
+    while not daemon.stop_requested.wait(1.0):
+        if idle_timeout is not None and daemon.idle_for() > idle_timeout:
+            print(f"空闲超过{idle_timeout:.0f}秒，求解守护进程退出", flush=True)
+            break
+    server.shutdown()
+
+
+def serve(workers=None, idle_timeout=DAEMON_IDLE_TIMEOUT):
+    """启动守护进程并一直运行，直到收到stop请求或空闲超过idle_timeout秒；
+    已有守护进程在运行（或正在预热）时直接返回
+
+    预热之前先取得独占锁，两次几乎同时的start_daemon只会有一个守护进程继续运行。
+    """
+    lock_file = _acquire_lock()
+    if lock_file is None:
+        print("求解守护进程已经在运行")
+        return
+    daemon = SolveDaemon(workers)
+    if USE_UNIX_SOCKET:
+        if os.path.exists(DAEMON_SOCKET):
+            try:
+                _connect(CONNECT_TIMEOUT).close()
+            except DaemonUnavailable:
+                # 连接不上：上一次异常退出留下的socket文件
+                os.unlink(DAEMON_SOCKET)
+            else:
+                print("求解守护进程已经在运行")
+                daemon.close()
+                lock_file.close()
+                return
+        server = socketserver.ThreadingUnixStreamServer(DAEMON_SOCKET, _Handler)
+        address = DAEMON_SOCKET
+    else:
+        server = socketserver.ThreadingTCPServer(("127.0.0.1", DAEMON_PORT), _Handler)
+        address = f"127.0.0.1:{DAEMON_PORT}"
+    server.daemon_threads = True
+    server.solve_daemon = daemon
+    print(f"求解守护进程已启动 (pid={os.getpid()})，地址: {address}", flush=True)
+    # 被kill时也走下面的清理，删除socket文件并结束工作进程
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    threading.Thread(target=_watch, args=(server, daemon, idle_timeout), name="cube-daemon-watch",
+                     daemon=True).start()
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        daemon.close()
+        if USE_UNIX_SOCKET and os.path.exists(DAEMON_SOCKET):
+            os.unlink(DAEMON_SOCKET)
+        lock_file.close()
+
+
+# ---------------- 客户端 ----------------
+
+def _connect(timeout):
+    try:
+        if USE_UNIX_SOCKET:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(timeout)
+            sock.connect(DAEMON_SOCKET)
+            return sock
+        return socket.create_connection(("127.0.0.1", DAEMON_PORT), timeout)
+    except OSError as e:
+        raise DaemonUnavailable(f"无法连接求解守护进程: {e}") from None
+
+
+def request_daemon(message, timeout=None):
+    """发送一条请求并返回回复；连不上时抛出DaemonUnavailable，超时抛出DeadlineExceeded"""
+    sock = _connect(CONNECT_TIMEOUT if timeout is None else min(timeout, CONNECT_TIMEOUT))
+    with sock:
+        sock.settimeout(timeout)
+        try:
+            with sock.makefile("rwb") as f:
+                f.write((json.dumps(message) + "\n").encode("utf-8"))
+                f.flush()
+                line = f.readline()
+        except socket.timeout:
+            raise DeadlineExceeded("求解守护进程未在截止时间前回复") from None
+        except OSError as e:
+            raise DaemonUnavailable(f"与求解守护进程的连接中断: {e}") from None
+    if not line:
+        raise DaemonUnavailable("求解守护进程关闭了连接")
+    return json.loads(line)
+
+
+def is_daemon_running():
+    try:
+        return request_daemon({"op": "ping"}, timeout=CONNECT_TIMEOUT).get("ok", False)
+    except (DaemonUnavailable, DeadlineExceeded):
+        return False
+
+
+def start_daemon(wait=5.0, workers=None):
+    """守护进程没有运行时在后台启动一个，最多等待wait秒直到可以连接，返回是否可用
+
+    wait为0时只负责启动，不等待（表在守护进程中加载，调用方先回退到本进程求解）。
+    """
+    if is_daemon_running():
+        return True
+    command = [sys.executable, os.path.abspath(__file__), "serve"]
+    if workers:
+        command += ["--workers", str(workers)]
+    options = {"start_new_session": True} if os.name == "posix" else {
+        "creationflags": getattr(subprocess, "DETACHED_PROCESS", 0)}
+    subprocess.Popen(command, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                     stderr=subprocess.DEVNULL, **options)
+    deadline = time.monotonic() + wait
+    while time.monotonic() < deadline:
+        if is_daemon_running():
+            return True
+        time.sleep(0.05)
+    return False
+
+
+def stop_daemon():
+    """让正在运行的守护进程退出，返回是否有守护进程收到了请求"""
+    try:
+        return request_daemon({"op": "stop"}, timeout=CONNECT_TIMEOUT).get("ok", False)
+    except (DaemonUnavailable, DeadlineExceeded):
+        return False
+
+
+def daemon_solve(cube_str, max_depth=None, timeout=None):
+    """通过守护进程求解，返回解法字符串
+
+    timeout（秒）同时作为守护进程中的求解时限，超时的求解进程在守护进程中被结束。
+    状态无效或求解失败时抛出ValueError，超时抛出DeadlineExceeded。
+    """
+    response = request_daemon({"cube": cube_str, "max_depth": max_depth, "timeout": timeout}, timeout)
+    if response.get("timed_out"):
+        raise DeadlineExceeded(response["error"])
+    if response.get("error"):
+        raise ValueError(response["error"])
+    return response["solution"]
+
+
+def client_solve(cube_str, deadline=None, max_depth=None):
+    """优先通过守护进程求解，守护进程不可用时在本进程用supervised_solve求解
+
+    deadline为time.monotonic()的截止时间；超时抛出DeadlineExceeded。
+    """
+    try:
+        return daemon_solve(cube_str, max_depth, remaining_time(deadline))
+    except DaemonUnavailable:
+        return supervised_solve(cube_str, deadline, max_depth)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="本地求解守护进程")
+    sub = parser.add_subparsers(dest="command", required=True)
+    serve_parser = sub.add_parser("serve", help="在前台运行守护进程")
+    serve_parser.add_argument("--workers", type=int, default=None, help="求解进程数，默认CPU核数")
+    serve_parser.add_argument("--idle-timeout", type=float, default=DAEMON_IDLE_TIMEOUT,
+                              help="连续多少秒没有请求时自动退出，0表示一直运行")
+    sub.add_parser("stop", help="让正在运行的守护进程退出")
+    sub.add_parser("ping", help="检查守护进程是否在运行")
+    sub.add_parser("stats", help="显示守护进程的统计信息")
+    solve_parser = sub.add_parser("solve", help="通过守护进程求解一个状态")
+    solve_parser.add_argument("cube", help="54字符的kociemba字符串")
+    args = parser.parse_args()
+    if args.command == "serve":
+        serve(args.workers, args.idle_timeout or None)
+    elif args.command == "stop":
+        print("已停止" if stop_daemon() else "未运行")
+    elif args.command == "ping":
+        print("运行中" if is_daemon_running() else "未运行")
+    elif args.command == "stats":
+        print(json.dumps(request_daemon({"op": "stats"}), ensure_ascii=False))
+    else:
+        start = time.perf_counter()
+        solution = daemon_solve(args.cube)
+        print(f"{solution} ({(time.perf_counter() - start) * 1000:.1f} ms)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,461 @@
+# 魔方状态引擎：用预先计算的置换表实现面转动
+from collections import deque
+from functools import lru_cache
+
+import numpy as np
+
+"""state:
+整个魔方用54个uint8保存，面的顺序与cube.py中的faces一致：
+上(0) 下(1) 左(2) 右(3) 前(4) 后(5)，每个面9个贴纸按行展开，
+第i个面占用 state[9*i : 9*i+9]
+
+      0  1  2
+      3  4  5
+      6  7  8
+18 19 20 36 37 38 27 28 29 45 46 47
+21 22 23 39 40 41 30 31 32 48 49 50
+24 25 26 42 43 44 33 34 35 51 52 53
+      9 10 11
+     12 13 14
+     15 16 17
+"""
+
+# 面的名称，顺序与faces下标一致
+FACE_NAMES = "UDLRFB"
+
+# 面本身顺时针旋转90度：new[i] = old[_FACE_TURN[i]]
+_FACE_TURN = [6, 3, 0, 7, 4, 1, 8, 5, 2]
+
+# 每个面顺时针转动时侧面贴纸的三组四循环，(a, b, c, d)表示 a→b→c→d→a
+_SIDE_CYCLES = {
+    "U": ((18, 45, 27, 36), (19, 46, 28, 37), (20, 47, 29, 38)),
+    "D": ((24, 42, 33, 51), (25, 43, 34, 52), (26, 44, 35, 53)),
+    "L": ((0, 36, 9, 53), (3, 39, 12, 50), (6, 42, 15, 47)),
+    "R": ((2, 51, 11, 38), (5, 48, 14, 41), (8, 45, 17, 44)),
+    "F": ((6, 27, 11, 26), (7, 30, 10, 23), (8, 33, 9, 20)),
+    "B": ((0, 24, 17, 29), (1, 21, 16, 32), (2, 18, 15, 35)),
+}
+
+# 18种基本转动，下标 = 3 * 面下标 + (0:顺时针, 1:逆时针, 2:180度)
+MOVE_NAMES = [face + suffix for face in FACE_NAMES for suffix in ("", "'", "2")]
+MOVE_INDEX = {name: i for i, name in enumerate(MOVE_NAMES)}
+
+# 已还原状态：每个面的贴纸值等于面下标
+SOLVED_STATE = np.repeat(np.arange(6, dtype=np.uint8), 9)
+SOLVED_STATE.flags.writeable = False
+
+
+def _quarter_turn(face):
+    """生成某个面顺时针转动90度的置换（new = old[perm]）"""
+    perm = np.arange(54, dtype=np.intp)
+    base = 9 * FACE_NAMES.index(face)
+    perm[base:base + 9] = base + np.array(_FACE_TURN)
+    for a, b, c, d in _SIDE_CYCLES[face]:
+        perm[b], perm[c], perm[d], perm[a] = a, b, c, d
+    return perm
+
+
+def _build_move_table():
+    """构造18×54的转动置换表"""
+    table = np.empty((len(MOVE_NAMES), 54), dtype=np.intp)
+    for face in FACE_NAMES:
+        quarter = _quarter_turn(face)
+        half = quarter[quarter]
+        i = MOVE_INDEX[face]
+        table[i] = quarter
+        table[i + 1] = half[quarter]  # 转三次90度即逆时针
+        table[i + 2] = half
+    table.flags.writeable = False
+    return table
+
+
+# MOVE_TABLE[m]作用于状态：new_state = state[MOVE_TABLE[m]]
+MOVE_TABLE = _build_move_table()
+
+
+def faces_to_state(faces, out=None):
+    """把6个3x3的面（列表或数组）转换为54元素的uint8状态"""
+    if out is None:
+        out = np.empty(54, dtype=np.uint8)
+    for i in range(6):
+        out[9 * i:9 * i + 9] = np.asarray(faces[i]).ravel()
+    return out
+
+
+def state_to_faces(state):
+    """返回状态上的6个3x3视图（与state共享内存）"""
+    return [state[9 * i:9 * i + 9].reshape(3, 3) for i in range(6)]
+
+
+# kociemba字符串的面顺序为 U R F D L B，KOCIEMBA_ORDER为对应的状态下标
+KOCIEMBA_ORDER = np.concatenate([9 * FACE_NAMES.index(f) + np.arange(9) for f in "URFDLB"])
+_FACE_LETTERS = np.frombuffer(FACE_NAMES.encode(), dtype=np.uint8)
+
+
+def to_kociemba(state):
+    """生成kociemba输入字符串，颜色值i对应第i个面的字母（与cube.py的FACE_MAP一致）"""
+    return _FACE_LETTERS[np.asarray(state)[KOCIEMBA_ORDER] % 6].tobytes().decode()
+
+
+def from_kociemba(cube_str):
+    """把54字符的kociemba字符串还原成状态数组，元素为各字符的ASCII码（可再用normalize_colors换色）"""
+    if len(cube_str) != 54:
+        raise ValueError(f"魔方字符串长度必须为54，当前长度为{len(cube_str)}")
+    state = np.empty(54, dtype=np.uint8)
+    state[KOCIEMBA_ORDER] = np.frombuffer(cube_str.encode("ascii"), dtype=np.uint8)
+    return state
+
+
+def is_solved(state):
+    """判断每个面是否只有一种颜色"""
+    grid = np.asarray(state).reshape(6, 9)
+    return bool((grid == grid[:, 4:5]).all())
+
+
+class FaceList(list):
+    """faces列表：六个3x3视图共享同一个54元素uint8状态
+
+    可以像原来的faces一样按 faces[i][row][col] 读写，
+    转动时只对底层状态做一次按下标取值，不再复制整个魔方。
+    """
+
+    __slots__ = ("state",)
+
+    def __init__(self, state=None):
+        if state is None:
+            state = SOLVED_STATE
+        self.state = np.array(state, dtype=np.uint8).reshape(54)
+        super().__init__(state_to_faces(self.state))
+
+    def turn(self, move):
+        """原地执行一步转动，move可以是名称（如"R'"）或下标"""
+        # 54字节的临时结果比 take(out=...) 再拷回更快
+        np.copyto(self.state, self.state[MOVE_TABLE[MOVE_INDEX.get(move, move)]])
+
+    def apply(self, moves):
+        """原地执行一整串转动，整串先编译成一个置换，只取值一次"""
+        np.copyto(self.state, self.state[compile_moves(moves)])
+
+    def load(self, faces):
+        """从其他faces数据原地导入状态，已有的视图保持有效"""
+        faces_to_state(faces, out=self.state)
+        return self
+
+    def snapshot(self):
+        """返回当前状态的不可变副本（CubeState）"""
+        return CubeState(self.state)
+
+    def copy(self):
+        return FaceList(self.state)
+
+    def __copy__(self):
+        return self.copy()
+
+    def __deepcopy__(self, memo):
+        return self.copy()
+
+
+class CubeState:
+    """不可变的魔方状态：54字节存储，可哈希，可作为字典键并在线程间共享
+
+    apply返回新的状态而不修改自身；state/faces返回共享同一块内存的只读视图。
+    """
+
+    __slots__ = ("_data", "_hash")
+
+    def __init__(self, state=None):
+        if state is None:
+            data = SOLVED_STATE.tobytes()
+        elif isinstance(state, CubeState):
+            data = state._data
+        elif isinstance(state, (bytes, bytearray)):
+            data = bytes(state)
+        else:
+            data = np.asarray(state, dtype=np.uint8).tobytes()
+        if len(data) != 54:
+            raise ValueError(f"魔方状态必须为54字节，当前为{len(data)}字节")
+        object.__setattr__(self, "_data", data)
+        object.__setattr__(self, "_hash", hash(data))
+
+    @classmethod
+    def from_faces(cls, faces):
+        """从6个3x3的面构造状态"""
+        if isinstance(faces, FaceList):
+            return cls(faces.state)
+        return cls(faces_to_state(faces))
+
+    @classmethod
+    def _from_bytes(cls, data):
+        # 内部使用：data已保证是54字节的bytes
+        obj = object.__new__(cls)
+        object.__setattr__(obj, "_data", data)
+        object.__setattr__(obj, "_hash", hash(data))
+        return obj
+
+    def __setattr__(self, name, value):
+        raise AttributeError("CubeState是不可变对象")
+
+    def __delattr__(self, name):
+        raise AttributeError("CubeState是不可变对象")
+
+    def __reduce__(self):
+        return (CubeState, (self._data,))
+
+    def __hash__(self):
+        return self._hash
+
+    def __eq__(self, other):
+        if not isinstance(other, CubeState):
+            return NotImplemented
+        return self._hash == other._hash and self._data == other._data
+
+    def __repr__(self):
+        return f"CubeState({self.to_kociemba()!r})"
+
+    @property
+    def data(self):
+        """54字节的原始数据"""
+        return self._data
+
+    @property
+    def state(self):
+        """54元素的只读uint8视图（不复制）"""
+        return np.frombuffer(self._data, dtype=np.uint8)
+
+    @property
+    def faces(self):
+        """与cube.py中faces布局一致的6个只读3x3视图（不复制）"""
+        return state_to_faces(self.state)
+
+    def apply(self, moves):
+        """执行一步或一串转动，返回新的CubeState"""
+        if isinstance(moves, (int, np.integer)):
+            perm = MOVE_TABLE[moves]
+        elif isinstance(moves, str) and moves in MOVE_INDEX:
+            perm = MOVE_TABLE[MOVE_INDEX[moves]]
+        else:
+            perm = compile_moves(moves)
+        return CubeState._from_bytes(self.state[perm].tobytes())
+
+    def is_solved(self):
+        return is_solved(self.state)
+
+    def to_kociemba(self):
+        return to_kociemba(self.state)
+
+    def to_face_list(self):
+        """返回可原地转动的FaceList副本"""
+        return FaceList(self.state)
+
+
+def turn(faces, move):
+    """对faces执行一步转动
+
+    FaceList直接在底层状态上置换；普通的面列表（例如外部导入的float数组）
+    按原来的约定原地替换各个面。
+    """
+    if isinstance(faces, FaceList):
+        faces.turn(move)
+        return
+    state = faces_to_state(faces)
+    new_faces = state_to_faces(state[MOVE_TABLE[MOVE_INDEX[move]]])
+    for i in range(6):
+        faces[i] = new_faces[i]
+
+
+# ---------------- 批量状态：(N, 54) 数组，每行一个魔方 ----------------
+
+def parse_moves(moves):
+    """把 "R U R' U'" 或 ["R", "U", ...] 或下标序列转换为转动下标数组"""
+    if isinstance(moves, str):
+        moves = moves.split()
+    return np.array([MOVE_INDEX.get(m, m) for m in moves], dtype=np.intp)
+
+
+def solved_states(n):
+    """生成n个已还原状态，形状 (n, 54)"""
+    return np.tile(SOLVED_STATE, (n, 1))
+
+
+def apply_move_batch(states, moves, out=None):
+    """对 (N, 54) 状态批量执行一步转动
+
+    moves为单个转动（名称或下标）时所有行执行同一转动；
+    为长度N的下标数组（或名称列表）时第i行执行moves[i]。
+    out可以是states本身，用于原地更新。
+    """
+    states = np.asarray(states)
+    if isinstance(moves, (str, int, np.integer)):
+        result = states[:, MOVE_TABLE[MOVE_INDEX.get(moves, moves)]]
+    else:
+        perms = MOVE_TABLE[parse_moves(moves)]
+        if len(perms) != len(states):
+            raise ValueError(f"转动数量({len(perms)})与状态数量({len(states)})不一致")
+        result = np.take_along_axis(states, perms, axis=1)
+    if out is None:
+        return result
+    out[...] = result
+    return out
+
+
+def apply_sequence_batch(states, sequence, out=None):
+    """对 (N, 54) 状态批量执行一串转动
+
+    sequence为一维（如 "R U R'"）时所有行执行同一序列，先把整串合成一个置换再取值一次；
+    为 (N, L) 的下标矩阵时第i行执行sequence[i]，按列逐步执行。
+    """
+    states = np.asarray(states)
+    if isinstance(sequence, str) or np.ndim(sequence) == 1:
+        return apply_perm_batch(states, compile_moves(sequence), out=out)
+    sequence = np.asarray(sequence, dtype=np.intp)
+    if sequence.shape[0] != len(states):
+        raise ValueError(f"序列数量({sequence.shape[0]})与状态数量({len(states)})不一致")
+    result = states
+    for column in sequence.T:
+        result = np.take_along_axis(result, MOVE_TABLE[column], axis=1)
+    if out is None:
+        return result
+    out[...] = result
+    return out
+
+
+def apply_perm_batch(states, perm, out=None):
+    """对 (N, 54) 状态执行同一个54元素置换"""
+    if out is None:
+        return np.asarray(states)[:, perm]
+    out[...] = np.asarray(states)[:, perm]
+    return out
+
+
+def is_solved_batch(states):
+    """批量判断是否已还原，返回长度N的bool数组"""
+    grid = np.asarray(states).reshape(-1, 6, 9)
+    return (grid == grid[:, :, 4:5]).all(axis=(1, 2))
+
+
+def scramble_batch(n, length, rng=None):
+    """生成n个随机打乱的状态，返回 (states, moves)
+
+    moves为 (n, length) 的转动下标矩阵，相邻两步不会转同一个面。
+    """
+    rng = np.random.default_rng(rng)
+    moves = rng.integers(0, len(MOVE_NAMES), size=(n, length))
+    # 与上一步同面时换成其余五个面之一
+    for j in range(1, length):
+        same = moves[:, j] // 3 == moves[:, j - 1] // 3
+        shift = rng.integers(1, 6, size=int(same.sum()))
+        face = (moves[same, j] // 3 + shift) % 6
+        moves[same, j] = 3 * face + moves[same, j] % 3
+    states = apply_sequence_batch(solved_states(n), moves)
+    return states, moves
+
+
+# ---------------- 转动序列编译：整串转动合成为一个54元素置换 ----------------
+
+# 编译结果缓存的条目数上限（每条约0.5KB）
+COMPILE_CACHE_SIZE = 4096
+
+
+def normalize_moves(moves):
+    """把转动序列规范化为以单个空格分隔的字符串，例如 "R U R' U' F2"
+
+    moves可以是字符串、名称列表或下标序列；转动名称的合法性在编译时检查。
+    """
+    if isinstance(moves, str):
+        return " ".join(moves.split())
+    return " ".join(MOVE_NAMES[m] if isinstance(m, (int, np.integer)) else m for m in moves)
+
+
+@lru_cache(maxsize=COMPILE_CACHE_SIZE)
+def _compile_normalized(text):
+    perm = np.arange(54, dtype=np.intp)
+    for name in text.split():
+        if name not in MOVE_INDEX:
+            raise ValueError(f"无效的转动: {name!r}")
+        perm = perm[MOVE_TABLE[MOVE_INDEX[name]]]
+    perm.flags.writeable = False
+    return perm
+
+
+def compile_moves(moves):
+    """把一串转动合成为一个置换：state[compile_moves(moves)] 等价于依次执行每一步
+
+    结果按规范化后的字符串缓存在有界LRU中，重复的公式和解法只编译一次；
+    遇到无法识别的转动抛出ValueError。
+    """
+    return _compile_normalized(normalize_moves(moves))
+
+
+def apply_moves(state, moves):
+    """对单个状态执行一串转动，返回新状态"""
+    return np.asarray(state)[compile_moves(moves)]
+
+
+def same_effect(moves_a, moves_b):
+    """判断两串转动对魔方的作用是否完全相同"""
+    return bool(np.array_equal(compile_moves(moves_a), compile_moves(moves_b)))
+
+
+# 每个转动的反向转动：X <-> X'，X2不变
+INVERSE_MOVE = [3 * (m // 3) + (1, 0, 2)[m % 3] for m in range(len(MOVE_NAMES))]
+
+
+def invert_moves(moves):
+    """返回撤销moves的转动序列（名称列表）：倒序并把每一步换成反方向"""
+    moves = normalize_moves(moves).split()
+    return [MOVE_NAMES[INVERSE_MOVE[MOVE_INDEX[m]]] for m in reversed(moves)]
+
+
+# 每个转动相当于顺时针转几个90度，以及反过来由 (面, 90度个数) 得到转动名称
+MOVE_QUARTERS = [(1, 3, 2)[m % 3] for m in range(len(MOVE_NAMES))]
+_QUARTER_MOVE = {1: 0, 3: 1, 2: 2}
+
+
+# 流式化简时最多暂存的同轴转动组数；超出后最早的一组直接输出，不再参与抵消
+SIMPLIFY_WINDOW = 256
+
+
+def _axis_group_moves(axis, quarters):
+    for side in (0, 1):
+        if quarters[side]:
+            yield MOVE_NAMES[3 * (2 * axis + side) + _QUARTER_MOVE[quarters[side]]]
+
+
+def iter_simplify_moves(moves, window=SIMPLIFY_WINDOW):
+    """流式化简：从可迭代对象中逐个读入转动（名称或下标），产出化简后的转动名称
+
+    栈中每一项是同一根轴上（U/D、L/R、F/B互为对面，转动可以交换）连续转动的累计：
+    两个面各自转了几个90度（模4）。新的转动与栈顶同轴时直接累加，两面都归零就出栈，
+    之后的转动可以继续与新的栈顶合并，例如 "U D U'" -> "D"，"R U U' R'" -> 空。
+    同一轴上的结果按U/L/F在前的固定顺序输出。
+    栈中超过window组时输出最早的一组，因此无限长的输入也只占用固定内存；
+    window为None时不限制，结果与simplify_moves相同。遇到无法识别的转动抛出ValueError。
+    """
+    stack = deque()
+    for move in moves:
+        if isinstance(move, (int, np.integer)):
+            m = int(move)
+        elif move in MOVE_INDEX:
+            m = MOVE_INDEX[move]
+        else:
+            raise ValueError(f"无效的转动: {move!r}")
+        face = m // 3
+        axis, side = face >> 1, face & 1
+        if stack and stack[-1][0] == axis:
+            quarters = stack[-1][1]
+            quarters[side] = (quarters[side] + MOVE_QUARTERS[m]) % 4
+            if not quarters[0] and not quarters[1]:
+                stack.pop()
+        else:
+            quarters = [0, 0]
+            quarters[side] = MOVE_QUARTERS[m]
+            stack.append((axis, quarters))
+            if window is not None and len(stack) > window:
+                yield from _axis_group_moves(*stack.popleft())
+    while stack:
+        yield from _axis_group_moves(*stack.popleft())
+
+
+def simplify_moves(moves):
+    """一遍扫描化简转动序列（字符串、名称列表或下标序列），返回名称列表，规则见iter_simplify_moves"""
+    return list(iter_simplify_moves(normalize_moves(moves).split(), window=None))
@@ -0,0 +1,351 @@
+# 最优解求解：IDA*搜索 + 模式数据库（pattern database）
+#
+# 三个模式数据库分别记录“只看8个角块”“只看棱块0~5”“只看棱块6~11”时到还原的最少步数，
+# 取三者最大值作为IDA*的下界，得到的解法步数一定最少。
+# 数据库由并行BFS工具一次生成（python cube_optimal.py build），4位打包后保存为.npy，
+# 求解时用mmap_mode='r'打开，多个工作进程共享同一份只读内存。
+#
+# 适用范围：搜索是纯Python实现，每加深一层节点数约增加13倍，
+# 最优解为14步的状态已经需要约9秒，15步以上在求解组合的OPTIMAL_BUDGET内基本搜不完。
+# 随机打乱的状态最优解通常是17~18步，所以求解组合只在模式数据库给出的下界
+# 不超过PRACTICAL_DEPTH时才加入最优解搜索（见lower_bound）。
+import argparse
+import multiprocessing
+import os
+import time
+
+import numpy as np
+
+from cube_cubie import MOVE_CUBIES, get_corners, get_twist, move_table
+from cube_engine import MOVE_NAMES
+from cube_twophase import _pack_nibbles, cube_to_cubie
+
+# 数据库目录，可用环境变量CUBE_OPTIMAL_TABLES指定
+PDB_DIR = os.environ.get(
+    "CUBE_OPTIMAL_TABLES", os.path.join(os.path.dirname(os.path.abspath(__file__)), "optimal_tables")
+)
+# 最优解最多20步
+MAX_LENGTH = 20
+# 求解组合中最优解搜索的默认时限（秒）
+OPTIMAL_BUDGET = 30.0
+# 下界超过这个步数时最优解搜索在OPTIMAL_BUDGET内搜不完，求解组合不再运行它
+PRACTICAL_DEPTH = 14
+
+N_MOVES = len(MOVE_NAMES)
+N_TWIST = 2187
+N_CORNERS = 40320
+EDGE_GROUPS = {"edges_a": (0, 1, 2, 3, 4, 5), "edges_b": (6, 7, 8, 9, 10, 11)}
+N_EDGE_POSITIONS = 12 * 11 * 10 * 9 * 8 * 7  # 6个棱块在12个位置上的摆法
+N_EDGE_FLIPS = 64  # 6个棱块各自的方向
+PDB_SIZES = {
+    "corners": N_CORNERS * N_TWIST,
+    "edges_a": N_EDGE_POSITIONS * N_EDGE_FLIPS,
+    "edges_b": N_EDGE_POSITIONS * N_EDGE_FLIPS,
+}
+_UNVISITED = 15
+# BFS每次处理的状态数，限制单个进程的内存占用
+_BFS_CHUNK = 1 << 20
+
+
+# ---------------- 6个棱块的坐标：每个棱块所在位置（有序摆法编号）+ 各自方向 ----------------
+
+def encode_positions(positions):
+    """(N, 6) 的不同位置编号为 0 ~ 665279：第i个棱块的位置在剩余位置中的序号按混合进制组合"""
+    positions = np.asarray(positions, dtype=np.int64)
+    rank = np.zeros(len(positions), dtype=np.int64)
+    for i in range(6):
+        smaller = (positions[:, :i] < positions[:, i:i + 1]).sum(axis=1)
+        rank = rank * (12 - i) + positions[:, i] - smaller
+    return rank
+
+
+def decode_positions(rank):
+    rank = np.atleast_1d(np.asarray(rank, dtype=np.int64)).copy()
+    digits = np.empty((len(rank), 6), dtype=np.int64)
+    for i in range(5, -1, -1):
+        rank, digits[:, i] = np.divmod(rank, 12 - i)
+    available = np.tile(np.arange(12), (len(rank), 1))
+    positions = np.empty_like(digits)
+    rows = np.arange(len(rank))
+    for i in range(6):
+        positions[:, i] = available[rows, digits[:, i]]
+        keep = np.arange(11 - i)
+        keep = keep + (keep >= digits[:, i:i + 1])
+        available = available[rows[:, None], keep]
+    return positions
+
+
+def edge_group_coordinate(ep, eo, group):
+    """cubie表示中一组6个棱块的坐标：位置编号 * 64 + 方向位"""
+    ep = np.asarray(ep)
+    positions = [int(np.flatnonzero(ep == piece)[0]) for piece in group]
+    flips = sum(int(eo[p]) << k for k, p in enumerate(positions))
+    return int(encode_positions([positions])[0]) * N_EDGE_FLIPS + flips
+
+
+_edge_tables = {}
+
+
+def edge_move_tables(group):
+    """返回 (位置转动表, 翻转掩码表)，形状都是 (665280, 18)
+
+    转动后位置编号为 position_move[x, m]，方向位与 flip_mask[x, m] 异或。
+    """
+    if group not in _edge_tables:
+        positions = decode_positions(np.arange(N_EDGE_POSITIONS))
+        position_move = np.empty((N_EDGE_POSITIONS, N_MOVES), dtype=np.uint32)
+        flip_mask = np.empty((N_EDGE_POSITIONS, N_MOVES), dtype=np.uint8)
+        weights = 1 << np.arange(6)
+        for m, move in enumerate(MOVE_CUBIES):
+            # 位置p上的棱块转到位置i，其中 move.ep[i] == p；方向加上 move.eo[i]
+            moved = np.argsort(move.ep)[positions]
+            position_move[:, m] = encode_positions(moved)
+            flip_mask[:, m] = (move.eo[moved].astype(np.int64) * weights).sum(axis=1)
+        _edge_tables[group] = (position_move, flip_mask)
+    return _edge_tables[group]
+
+
+def _neighbours(kind, index):
+    """一批状态下标执行18种转动后的下标，形状 (N, 18)"""
+    if kind == "corners":
+        corners, twist = np.divmod(index, N_TWIST)
+        return move_table("corners")[corners].astype(np.int64) * N_TWIST + move_table("twist")[twist]
+    position_move, flip_mask = edge_move_tables(EDGE_GROUPS[kind])
+    position, flips = np.divmod(index, N_EDGE_FLIPS)
+    return position_move[position].astype(np.int64) * N_EDGE_FLIPS + (flips[:, None] ^ flip_mask[position])
+
+
+def _solved_index(kind):
+    if kind == "corners":
+        return 0
+    group = EDGE_GROUPS[kind]
+    return edge_group_coordinate(np.arange(12), np.zeros(12, dtype=np.int8), group)
+
+
+# ---------------- 并行BFS ----------------
+
+def _expand_range(args):
+    """BFS工作进程：把 [start, stop) 中距离为depth的状态向外扩展一层，返回是否有新状态"""
+    path, kind, start, stop, depth = args
+    dist = np.memmap(path, dtype=np.uint8, mode="r+", shape=(PDB_SIZES[kind],))
+    found = False
+    frontier = start + np.flatnonzero(dist[start:stop] == depth)
+    for begin in range(0, len(frontier), _BFS_CHUNK):
+        following = _neighbours(kind, frontier[begin:begin + _BFS_CHUNK]).ravel()
+        following = following[dist[following] == _UNVISITED]
+        if len(following):
+            # 多个进程可能同时写入同一个位置，写入的值相同，不会冲突
+            dist[following] = depth + 1
+            found = True
+    dist.flush()
+    del dist
+    return found
+
+
+def build_database(kind, pdb_dir=PDB_DIR, workers=None):
+    """逐层并行BFS生成一个模式数据库，4位打包后写入 pdb_dir/kind.npy
+
+    距离数组放在磁盘上的内存映射文件中，各工作进程按下标区间分工扩展同一层，
+    每层结束后同步，再开始下一层。
+    """
+    size = PDB_SIZES[kind]
+    workers = workers or os.cpu_count() or 1
+    os.makedirs(pdb_dir, exist_ok=True)
+    raw_path = os.path.join(pdb_dir, f"{kind}.{os.getpid()}.raw")
+    dist = np.memmap(raw_path, dtype=np.uint8, mode="w+", shape=(size,))
+    dist[:] = _UNVISITED
+    dist[_solved_index(kind)] = 0
+    dist.flush()
+    # 先在主进程生成转动表，fork出的工作进程直接继承
+    _neighbours(kind, np.zeros(1, dtype=np.int64))
+
+    step = -(-size // (workers * 4))
+    ranges = [(raw_path, kind, start, min(start + step, size), 0) for start in range(0, size, step)]
+    print(f"生成模式数据库 {kind}：{size} 个状态，{workers} 个进程")
+    start_time = time.time()
+    depth = 0
+    pool = multiprocessing.Pool(workers) if workers > 1 else None
+    try:
+        while True:
+            tasks = [(path, kind, a, b, depth) for path, kind, a, b, _ in ranges]
+            found = pool.map(_expand_range, tasks) if pool else list(map(_expand_range, tasks))
+            if not any(found):
+                break
+            depth += 1
+            if depth >= _UNVISITED:
+                raise RuntimeError("模式数据库深度超出4位能表示的范围")
+            print(f"  第{depth}层: {int(np.count_nonzero(dist == depth))} 个状态，"
+                  f"已用时 {time.time() - start_time:.0f} 秒")
+    finally:
+        if pool:
+            pool.close()
+            pool.join()
+
+    path = os.path.join(pdb_dir, kind + ".npy")
+    temp = f"{path}.{os.getpid()}.tmp"
+    with open(temp, "wb") as f:
+        np.save(f, _pack_nibbles(np.asarray(dist)))
+    os.replace(temp, path)
+    del dist
+    os.remove(raw_path)
+    print(f"模式数据库 {kind} 生成完成，最大距离 {depth}，用时 {time.time() - start_time:.0f} 秒")
+
+
+def build_databases(pdb_dir=PDB_DIR, workers=None):
+    """生成全部模式数据库和棱块转动表"""
+    os.makedirs(pdb_dir, exist_ok=True)
+    for kind, group in EDGE_GROUPS.items():
+        position_move, flip_mask = edge_move_tables(group)
+        np.save(os.path.join(pdb_dir, f"{kind}_position_move.npy"), position_move.ravel())
+        np.save(os.path.join(pdb_dir, f"{kind}_flip_mask.npy"), flip_mask.ravel())
+    for kind in PDB_SIZES:
+        build_database(kind, pdb_dir, workers)
+
+
+TABLE_NAMES = (
+    "corners", "edges_a", "edges_b",
+    "edges_a_position_move", "edges_a_flip_mask", "edges_b_position_move", "edges_b_flip_mask",
+)
+
+
+def databases_available(pdb_dir=PDB_DIR):
+    return all(os.path.exists(os.path.join(pdb_dir, name + ".npy")) for name in TABLE_NAMES)
+
+
+# ---------------- IDA*搜索 ----------------
+
+class _SearchTimeout(Exception):
+    pass
+
+
+class OptimalSolver:
+    """IDA*最优解搜索；数据库需要先用 build_databases 生成"""
+
+    def __init__(self, pdb_dir=PDB_DIR):
+        if not databases_available(pdb_dir):
+            raise FileNotFoundError(f"{pdb_dir} 中没有模式数据库，请先运行 python cube_optimal.py build")
+        tables = {name: memoryview(np.load(os.path.join(pdb_dir, name + ".npy"), mmap_mode="r"))
+                  for name in TABLE_NAMES}
+        self.corners_pdb = tables["corners"]
+        self.edges_a_pdb = tables["edges_a"]
+        self.edges_b_pdb = tables["edges_b"]
+        self.a_position_move = tables["edges_a_position_move"]
+        self.a_flip_mask = tables["edges_a_flip_mask"]
+        self.b_position_move = tables["edges_b_position_move"]
+        self.b_flip_mask = tables["edges_b_flip_mask"]
+        self.corners_move = memoryview(move_table("corners").ravel())
+        self.twist_move = memoryview(move_table("twist").ravel())
+
+    @staticmethod
+    def _coordinates(cube_str):
+        cubie = cube_to_cubie(cube_str)
+        corners = int(get_corners(cubie.cp))
+        twist = int(get_twist(cubie.co))
+        a = edge_group_coordinate(cubie.ep, cubie.eo, EDGE_GROUPS["edges_a"])
+        b = edge_group_coordinate(cubie.ep, cubie.eo, EDGE_GROUPS["edges_b"])
+        return corners, twist, a, b
+
+    def _bound(self, corners, twist, a, b):
+        return max(self._lookup(self.corners_pdb, corners * N_TWIST + twist),
+                   self._lookup(self.edges_a_pdb, a), self._lookup(self.edges_b_pdb, b))
+
+    def lower_bound(self, cube_str):
+        """三个模式数据库给出的最少步数下界，只查表不搜索"""
+        return self._bound(*self._coordinates(cube_str))
+
+    def solve(self, cube_str, max_length=MAX_LENGTH, budget=None):
+        """返回步数最少的解法字符串；budget秒内没有完成时抛出TimeoutError"""
+        corners, twist, a, b = self._coordinates(cube_str)
+        self.deadline = None if budget is None else time.monotonic() + budget
+        self.nodes = 0
+        self.path = []
+        start = self._bound(corners, twist, a, b)
+        try:
+            for depth in range(start, max_length + 1):
+                if self._search(corners, twist, a, b, depth, -1):
+                    return " ".join(MOVE_NAMES[m] for m in self.path)
+        except _SearchTimeout:
+            raise TimeoutError(f"{budget}秒内没有完成最优解搜索（已搜索 {self.nodes} 个节点）") from None
+        raise ValueError(f"没有不超过{max_length}步的解法")
+
+    @staticmethod
+    def _lookup(pdb, i):
+        return (pdb[i >> 1] >> ((i & 1) << 2)) & 15
+
+    def _search(self, corners, twist, a, b, togo, last):
+        if togo == 0:
+            return True
+        self.nodes += 1
+        if self.deadline is not None and not self.nodes & 1023 and time.monotonic() > self.deadline:
+            raise _SearchTimeout()
+        corners_move, twist_move = self.corners_move, self.twist_move
+        a_position_move, a_flip_mask = self.a_position_move, self.a_flip_mask
+        b_position_move, b_flip_mask = self.b_position_move, self.b_flip_mask
+        corners_pdb, edges_a_pdb, edges_b_pdb = self.corners_pdb, self.edges_a_pdb, self.edges_b_pdb
+        path = self.path
+        for m in range(N_MOVES):
+            face = m // 3
+            # 不连续转同一面；相对的两面只按一种顺序转
+            if face == last or (face ^ 1) == last and face < last:
+                continue
+            c = corners_move[corners * N_MOVES + m]
+            t = twist_move[twist * N_MOVES + m]
+            i = c * N_TWIST + t
+            if ((corners_pdb[i >> 1] >> ((i & 1) << 2)) & 15) >= togo:
+                continue
+            x = a >> 6
+            na = a_position_move[x * N_MOVES + m] << 6 | ((a & 63) ^ a_flip_mask[x * N_MOVES + m])
+            if ((edges_a_pdb[na >> 1] >> ((na & 1) << 2)) & 15) >= togo:
+                continue
+            x = b >> 6
+            nb = b_position_move[x * N_MOVES + m] << 6 | ((b & 63) ^ b_flip_mask[x * N_MOVES + m])
+            if ((edges_b_pdb[nb >> 1] >> ((nb & 1) << 2)) & 15) >= togo:
+                continue
+            path.append(m)
+            if self._search(c, t, na, nb, togo - 1, face):
+                return True
+            path.pop()
+        return False
+
+
+_solver = None
+
+
+def get_optimal_solver():
+    """进程内共享的求解器，首次使用时打开模式数据库"""
+    global _solver
+    if _solver is None:
+        _solver = OptimalSolver()
+    return _solver
+
+
+def solve_optimal(cube_str, max_length=MAX_LENGTH, budget=None):
+    """使用进程内共享的求解器求最优解"""
+    return get_optimal_solver().solve(cube_str, max_length, budget)
+
+
+def lower_bound(cube_str):
+    """最优解步数的下界，用来在搜索之前判断最优解搜索是否值得运行"""
+    return get_optimal_solver().lower_bound(cube_str)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="最优解模式数据库工具")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="并行BFS生成模式数据库")
+    build.add_argument("--workers", type=int, default=None, help="工作进程数，默认CPU核数")
+    build.add_argument("--dir", default=PDB_DIR, help="数据库目录")
+    solve = sub.add_parser("solve", help="求一个状态的最优解")
+    solve.add_argument("cube", help="54字符的kociemba字符串")
+    solve.add_argument("--budget", type=float, default=None, help="时限（秒）")
+    args = parser.parse_args()
+    if args.command == "build":
+        build_databases(args.dir, args.workers)
+    else:
+        start = time.time()
+        solution = solve_optimal(args.cube, budget=args.budget)
+        print(f"最优解 ({len(solution.split())}步，用时 {time.time() - start:.1f} 秒): {solution}")
+
+
+if __name__ == "__main__":
+    main()
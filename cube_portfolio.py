@@ -0,0 +1,149 @@
+# 求解组合：多个求解策略在独立进程中同时运行，取时限内最短的有效解，其余进程直接结束
+import multiprocessing
+import queue
+import sys
+import time
+from collections import namedtuple
+
+from cube_cache import get_solution_cache, kociemba_solve, normalize_cube_string
+from cube_engine import apply_moves, from_kociemba, is_solved
+from cube_symmetry import normalize_colors
+from cube_validate import VALID, reason_message, validate_cube_string
+
+# func(cube_str, *args)返回解法字符串或步骤列表，必须是模块顶层函数（子进程需要能导入）
+Strategy = namedtuple("Strategy", ["name", "func", "args"])
+
+# 默认总时限（秒），超时后返回已经得到的最好结果
+PORTFOLIO_BUDGET = 5.0
+
+# 得到不超过这个步数的解时不再等待其他策略（任意状态的最优解不超过20步）
+EARLY_ACCEPT_LENGTH = 20
+
+# Linux上用fork启动子进程，子进程直接继承已加载的求解表。其他系统用spawn：Windows没有fork，
+# macOS上fork多线程的Cocoa/OpenGL进程并不安全。spawn的子进程会重新导入调用方的主模块，
+# 所以主程序不能在导入时创建窗口或启动后台服务（cube.py把这些放在setup_gui()中），
+# 子进程执行的函数都在本模块、cube_supervisor等不依赖界面的模块中。
+_context = multiprocessing.get_context("fork" if sys.platform.startswith("linux") else "spawn")
+
+
+def kociemba_strategy(cube_str, max_depth=None):
+    """kociemba二阶段算法，max_depth为None时使用默认深度"""
+    return kociemba_solve(normalize_cube_string(cube_str), max_depth)
+
+
+def strategy_cache_depth(strategy):
+    """kociemba策略的结果可以直接查缓存，返回缓存用的深度；其他策略返回False"""
+    if strategy.func is kociemba_strategy:
+        return strategy.args[0] if strategy.args else None
+    return False
+
+
+def is_valid_solution(cube_str, steps):
+    """在引擎中模拟执行解法，检查能否把cube_str还原"""
+    try:
+        state = normalize_colors(from_kociemba(cube_str))
+        return is_solved(apply_moves(state, steps))
+    except (ValueError, KeyError):
+        return False
+
+
+def _run_strategy(results, name, func, cube_str, args):
+    """子进程入口：求解并把 (名称, 步骤列表, 错误信息) 放入结果队列"""
+    try:
+        solution = func(cube_str, *args)
+        steps = solution.split() if isinstance(solution, str) else list(solution)
+        results.put((name, steps, None))
+    except Exception as e:
+        results.put((name, None, f"{type(e).__name__}: {e}"))
+
+
+def run_portfolio(cube_str, strategies, budget=PORTFOLIO_BUDGET, accept_length=None):
+    """同时运行多个策略，返回 (最短有效解的步骤列表, 策略名称)，都失败时返回 (None, None)
+
+    每个策略在单独的进程中运行，总耗时约等于最慢策略的耗时，且不超过budget秒。
+    某个策略得到不超过accept_length步的有效解时立即采用，不再等待其他策略。
+    kociemba策略先查解法缓存，命中的不再启动进程；新得到的解写回缓存。
+    无法在引擎中还原cube_str的解会被丢弃；cube_str本身无法还原时不启动任何策略。
+    """
+    reason = validate_cube_string(cube_str)
+    if reason != VALID:
+        print(f"魔方状态无法还原: {reason_message(reason)}")
+        return None, None
+    cache = get_solution_cache()
+    candidates = []
+
+    def accept(name, steps):
+        if steps is None or not is_valid_solution(cube_str, steps):
+            print(f"{name}: 解法无效，已丢弃")
+            return False
+        print(f"{name}: {len(steps)}步")
+        candidates.append((len(steps), name, steps))
+        return accept_length is not None and len(steps) <= accept_length
+
+    pending = []
+    for strategy in strategies:
+        depth = strategy_cache_depth(strategy)
+        if depth is not False:
+            solution = cache.get(cube_str, depth)
+            if solution is not None and accept(strategy.name + "(缓存)", solution.split()):
+                return solution.split(), strategy.name
+            if solution is not None:
+                continue
+        pending.append(strategy)
+
+    if pending:
+        results = _context.Queue()
+        processes = {}
+        started = []
+        for strategy in pending:
+            process = _context.Process(
+                target=_run_strategy,
+                args=(results, strategy.name, strategy.func, cube_str, tuple(strategy.args)),
+                daemon=True,
+            )
+            process.start()
+            processes[strategy.name] = (process, strategy)
+            started.append(process)
+
+        deadline = time.monotonic() + budget
+        try:
+            while processes:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    print(f"求解组合超时 ({budget:.1f}秒)，结束剩余的 {len(processes)} 个策略: "
+                          f"{', '.join(processes)}")
+                    break
+                try:
+                    name, steps, error = results.get(timeout=min(remaining, 0.1))
+                except queue.Empty:
+                    # 异常退出（例如崩溃）的进程不会再有结果
+                    for name, (process, _) in list(processes.items()):
+                        if process.exitcode not in (None, 0):
+                            print(f"{name}异常退出 (exitcode={process.exitcode})")
+                            del processes[name]
+                    continue
+                _, strategy = processes.pop(name)
+                depth = strategy_cache_depth(strategy)
+                if error is not None:
+                    if depth and error.startswith("ValueError"):
+                        # cube_str已经验证过可以还原，限深的kociemba失败只说明没有这么短的解
+                        print(f"{name}: 没有不超过{depth}步的解")
+                    else:
+                        print(f"{name}失败: {error}")
+                    continue
+                if depth is not False and is_valid_solution(cube_str, steps):
+                    cache.put(cube_str, " ".join(steps), depth)
+                if accept(name, steps):
+                    break
+        finally:
+            for process, _ in processes.values():
+                process.terminate()
+            for process in started:
+                process.join()
+            results.close()
+
+    if not candidates:
+        return None, None
+    candidates.sort(key=lambda x: x[0])
+    _, name, steps = candidates[0]
+    return steps, name
@@ -0,0 +1,118 @@
+# 推测求解：手动转动魔方的间隙在低优先级的工作进程（或求解守护进程）中提前求解当前状态（可选再求解相邻状态），
+# 按Enter时多数情况下解法已经算好，直接开始播放
+#
+# 每次转动都会让之前排队的推测作废；已经交给工作进程的一次求解无法中断，
+# 它的结果仍然正确（键是求解的那个状态），照常放入缓存。
+import sys
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from cube_cache import kociemba_solve, normalize_cube_string
+from cube_engine import MOVE_NAMES, apply_moves, from_kociemba, to_kociemba
+from cube_portfolio import is_valid_solution
+from cube_supervisor import SolveSupervisor, deadline_after
+from cube_symmetry import normalize_colors
+from cube_validate import VALID, validate_cube_string
+
+# 推测结果最多保留的状态数，超出后淘汰最久未使用的
+SPECULATION_CACHE_SIZE = 64
+# 单个推测求解的时限（秒）
+SPECULATION_TIMEOUT = 5.0
+# 推测工作进程的nice值
+SPECULATION_NICE = 10
+
+
+def neighbour_states(cube_str):
+    """当前状态再转一步得到的18个状态（kociemba字符串）"""
+    state = normalize_colors(from_kociemba(cube_str))
+    return [to_kociemba(apply_moves(state, [move])) for move in MOVE_NAMES]
+
+
+class Speculator:
+    """在后台线程中依次推测求解，结果放在有界的LRU字典中
+
+    speculate()开始新一轮推测并让上一轮作废，cancel()只让当前一轮作废，
+    lookup()取出某个状态已经算好的解法。
+    solve(cube_str, deadline)返回解法字符串，例如通过求解守护进程求解；
+    为None时在单独的低优先级工作进程中求解（第一次推测时才启动），不占用按Enter时使用的求解进程。
+    """
+
+    def __init__(self, neighbours=False, size=SPECULATION_CACHE_SIZE, timeout=SPECULATION_TIMEOUT,
+                 nice=SPECULATION_NICE, solve=None):
+        self.neighbours = neighbours
+        self.size = size
+        self.timeout = timeout
+        self.hits = 0
+        self.misses = 0
+        self.solved = 0
+        self._solve = solve
+        self._supervisor = SolveSupervisor(nice=nice) if solve is None else None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="cube-speculator")
+        self._results = OrderedDict()
+        self._lock = threading.Lock()
+        self._generation = 0
+
+    def speculate(self, cube_str):
+        """让之前的推测作废，并在后台开始推测cube_str（及其相邻状态）"""
+        with self._lock:
+            self._generation += 1
+            generation = self._generation
+        if validate_cube_string(cube_str) != VALID:
+            return None
+        return self._executor.submit(self._run, generation, cube_str)
+
+    def cancel(self):
+        """让正在排队的推测作废"""
+        with self._lock:
+            self._generation += 1
+
+    def lookup(self, cube_str):
+        """返回cube_str已经推测好的解法（步骤列表），没有时返回None"""
+        key = normalize_cube_string(cube_str)
+        with self._lock:
+            steps = self._results.get(key)
+            if steps is None:
+                self.misses += 1
+                return None
+            self._results.move_to_end(key)
+            self.hits += 1
+            return list(steps)
+
+    def _run(self, generation, cube_str):
+        targets = [normalize_cube_string(cube_str)]
+        if self.neighbours:
+            targets += neighbour_states(cube_str)
+        for target in targets:
+            with self._lock:
+                if generation != self._generation:
+                    return
+                if target in self._results:
+                    continue
+            try:
+                if self._solve is not None:
+                    solution = self._solve(target, deadline_after(self.timeout))
+                else:
+                    solution = self._supervisor.call(kociemba_solve, (target, None), deadline_after(self.timeout))
+            except Exception:
+                # 推测失败不影响按Enter时的正常求解
+                continue
+            steps = solution.split()
+            if not is_valid_solution(target, steps):
+                continue
+            with self._lock:
+                self._results[target] = steps
+                self._results.move_to_end(target)
+                while len(self._results) > self.size:
+                    self._results.popitem(last=False)
+                self.solved += 1
+
+    def close(self):
+        self.cancel()
+        if sys.version_info >= (3, 9):
+            self._executor.shutdown(wait=False, cancel_futures=True)
+        else:
+            # 排队的推测已经作废，_run开始执行后会立即返回
+            self._executor.shutdown(wait=False)
+        if self._supervisor is not None:
+            self._supervisor.close()
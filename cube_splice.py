@@ -0,0 +1,46 @@
+# 拼接求解：记住上次求解后还没有执行的步骤，之后的手动转动逐个记录；
+# 再按Enter时，“手动转动的逆序列 + 剩余步骤”化简后就是一个现成的解法
+from cube_engine import invert_moves, simplify_moves
+from cube_portfolio import is_valid_solution
+
+# 手动转动超过这么多步后不再拼接，拼接的解法不会比新求解更短
+SPLICE_MAX_MOVES = 40
+
+
+class SpliceRecord:
+    """上次求解剩余的步骤和之后的手动转动
+
+    只在界面线程中使用；active为False时表示记录与当前魔方不对应，不能拼接。
+    """
+
+    def __init__(self, max_moves=SPLICE_MAX_MOVES):
+        self.max_moves = max_moves
+        self.forget()
+
+    def remember(self, steps):
+        """记录求解后剩余的步骤，清空手动转动记录"""
+        self.active = True
+        self.steps = list(steps)
+        self.manual_moves = []
+
+    def forget(self):
+        """魔方被整体替换（重置、导入）后，之前的解法不再可用"""
+        self.active = False
+        self.steps = []
+        self.manual_moves = []
+
+    def record(self, move):
+        if not self.active:
+            return
+        self.manual_moves.append(move)
+        if len(self.manual_moves) > self.max_moves:
+            self.forget()
+
+    def solution(self, cube_str):
+        """手动转动的逆序列接上剩余步骤并化简，返回步骤列表；没有记录或不能还原当前魔方时返回None"""
+        if not self.active:
+            return None
+        steps = simplify_moves(invert_moves(self.manual_moves) + self.steps)
+        if not steps or not is_valid_solution(cube_str, steps):
+            return None
+        return steps
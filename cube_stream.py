@@ -0,0 +1,86 @@
+# 流式化简转动记录：逐行读取，边读边输出化简后的转动，内存占用与记录长度无关
+#
+# 支持的输入：
+#   cube.py运行时打印的日志（execute_step输出的“执行: R'”等行）
+#   save_solution_to_file保存的解法文件（只读取“完整步骤”一节）
+#   每行若干个以空格分隔的转动（包含其他文字的行被忽略）
+import argparse
+import re
+import sys
+from itertools import chain
+
+from cube_engine import MOVE_INDEX, SIMPLIFY_WINDOW, iter_simplify_moves
+
+_TOKEN = re.compile(r"\S+")
+_LOG_PREFIX = "执行:"
+_SOLUTION_SECTION = "【完整步骤"
+
+
+def iter_line_moves(lines):
+    """从文本行中逐个取出转动名称
+
+    以“执行:”开头的行（execute_step实际执行的一步）取其后的转动；
+    其余行只有全部由转动名称组成时才读取，日志中“求解成功: ...”等提示行会被跳过。
+    """
+    for line in lines:
+        line = line.strip()
+        if line.startswith(_LOG_PREFIX):
+            line = line[len(_LOG_PREFIX):]
+        elif not all(match.group() in MOVE_INDEX for match in _TOKEN.finditer(line)):
+            continue
+        for match in _TOKEN.finditer(line):
+            yield match.group()
+
+
+def iter_solution_file(lines):
+    """从save_solution_to_file保存的文件中取出转动：只读“完整步骤”一节，避免与分组列表重复"""
+    in_section = False
+    for line in lines:
+        if line.startswith(_SOLUTION_SECTION):
+            in_section = True
+        elif in_section and line.strip() and not line.startswith("="):
+            yield from iter_line_moves([line])
+            return
+
+
+def iter_simplified(lines, window=SIMPLIFY_WINDOW):
+    """自动识别输入格式（解法文件以分隔线开头），产出化简后的转动"""
+    lines = iter(lines)
+    first = next(lines, None)
+    if first is None:
+        return
+    if first.startswith("="):
+        moves = iter_solution_file(lines)
+    else:
+        moves = iter_line_moves(chain([first], lines))
+    yield from iter_simplify_moves(moves, window)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="流式化简转动记录（日志、解法文件或转动序列）")
+    parser.add_argument("input", nargs="?", help="输入文件，默认读取标准输入")
+    parser.add_argument("--window", type=int, default=SIMPLIFY_WINDOW,
+                        help="最多暂存的同轴转动组数，越大能抵消的嵌套越深")
+    parser.add_argument("--per-line", type=int, default=20, help="每行输出的转动数")
+    args = parser.parse_args()
+
+    source = open(args.input, "r", encoding="utf-8") if args.input else sys.stdin
+    count = 0
+    try:
+        line = []
+        for move in iter_simplified(source, args.window):
+            line.append(move)
+            count += 1
+            if len(line) >= args.per_line:
+                print(" ".join(line), flush=True)
+                line = []
+        if line:
+            print(" ".join(line))
+    finally:
+        if args.input:
+            source.close()
+    print(f"化简后共 {count} 步", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+# 带截止时间的求解：kociemba的C调用无法中断，所以放在受监管的工作进程中运行，
+# 超过截止时间就结束该进程并重新启动一个，调用方得到SolveTimeout结果而不是一直等待
+import os
+import threading
+import time
+
+from cube_cache import get_solution_cache, kociemba_solve, normalize_cube_string
+from cube_portfolio import _context
+from cube_warmup import warmup
+
+
+class DeadlineExceeded(TimeoutError):
+    """受监管的调用在截止时间前没有完成"""
+
+
+class SolveCancelled(Exception):
+    """受监管的调用被restart()中止"""
+
+
+class SolveTimeout(list):
+    """求解超时的结果
+
+    是一个空的步骤列表，原来把 [] 当作“没有解法”的调用方不需要修改；
+    需要区分超时和无解时用 isinstance(result, SolveTimeout) 判断。
+    """
+
+    def __init__(self, elapsed, where=""):
+        super().__init__()
+        self.elapsed = elapsed
+        self.where = where
+
+    def __repr__(self):
+        return f"SolveTimeout(elapsed={self.elapsed:.2f}, where={self.where!r})"
+
+
+def deadline_after(seconds):
+    """把时限（秒）换成截止时间；seconds为None时返回None（不限时）"""
+    return None if seconds is None else time.monotonic() + seconds
+
+
+def remaining_time(deadline):
+    """距离截止时间还剩多少秒，不限时返回None"""
+    return None if deadline is None else max(0.0, deadline - time.monotonic())
+
+
+def _worker_main(conn, nice=0):
+    """工作进程入口：预热求解表，然后逐个执行 (func, args) 并把 (错误, 结果) 发回
+
+    nice大于0时先降低本进程的调度优先级（只在支持os.nice的系统上生效）。
+    """
+    if nice and hasattr(os, "nice"):
+        os.nice(nice)
+    warmup()
+    while True:
+        try:
+            func, args = conn.recv()
+        except (EOFError, OSError):
+            return
+        try:
+            result = func(*args)
+        except Exception as e:
+            conn.send((e, None))
+        else:
+            conn.send((None, result))
+
+
+class SolveSupervisor:
+    """管理一个常驻的求解工作进程
+
+    call() 把函数交给工作进程执行；到截止时间还没有结果时结束工作进程，
+    立即启动一个新的（新进程在后台预热），并抛出DeadlineExceeded。
+    同一时间只执行一个调用，多个线程调用时依次排队。
+    nice大于0的监管器使用低优先级的工作进程，用于不着急的后台求解。
+    restart() 可以从其他线程中止正在执行的调用。
+    """
+
+    def __init__(self, nice=0):
+        self.nice = nice
+        self._lock = threading.Lock()
+        self._process = None
+        self._conn = None
+        self._cancelled = False
+        self.restarts = 0
+
+    def _spawn(self):
+        parent, child = _context.Pipe()
+        process = _context.Process(target=_worker_main, args=(child, self.nice), name="cube-solve-worker", daemon=True)
+        process.start()
+        child.close()
+        self._process, self._conn = process, parent
+
+    def _kill(self):
+        if self._process is None:
+            return
+        self._process.kill()
+        self._process.join()
+        self._conn.close()
+        self._process = self._conn = None
+
+    def call(self, func, args=(), deadline=None):
+        """在工作进程中执行func(*args)并返回结果；func必须是模块顶层函数
+
+        func抛出的异常原样抛出；工作进程异常退出时抛出RuntimeError。
+        """
+        if deadline is not None and time.monotonic() >= deadline:
+            raise DeadlineExceeded("已经超过截止时间")
+        with self._lock:
+            self._cancelled = False
+            if self._process is None or not self._process.is_alive():
+                self._kill()
+                self._spawn()
+            self._conn.send((func, tuple(args)))
+            if not self._conn.poll(remaining_time(deadline)):
+                self._kill()
+                self.restarts += 1
+                self._spawn()
+                raise DeadlineExceeded(f"{getattr(func, '__name__', func)}未在截止时间前完成，已重启工作进程")
+            try:
+                error, result = self._conn.recv()
+            except (EOFError, OSError):
+                exitcode = self._process.exitcode
+                self._kill()
+                if self._cancelled:
+                    self._spawn()
+                    raise SolveCancelled("求解已取消，已重启工作进程") from None
+                raise RuntimeError(f"求解工作进程异常退出 (exitcode={exitcode})") from None
+        if error is not None:
+            raise error
+        return result
+
+    def restart(self):
+        """结束工作进程，不等待正在执行的调用；等待结果的call()随即抛出SolveCancelled
+
+        不获取锁，可以在call()阻塞时从其他线程调用。新的工作进程由被中止的call()
+        或下一次call()启动。
+        """
+        process = self._process
+        if process is None or not process.is_alive():
+            return False
+        self._cancelled = True
+        process.kill()
+        self.restarts += 1
+        return True
+
+    def close(self):
+        with self._lock:
+            self._kill()
+
+
+_supervisor = None
+_supervisor_lock = threading.Lock()
+
+
+def get_supervisor():
+    """进程内共享的求解监管器，首次使用时启动工作进程"""
+    global _supervisor
+    with _supervisor_lock:
+        if _supervisor is None:
+            _supervisor = SolveSupervisor()
+        return _supervisor
+
+
+def supervised_solve(cube_str, deadline, max_depth=None):
+    """与cached_solve相同，但kociemba在受监管的工作进程中运行
+
+    deadline为time.monotonic()的截止时间，None表示不限时（此时直接在当前进程求解）；
+    超时抛出DeadlineExceeded，求解失败时抛出与kociemba相同的异常。
+    """
+    cache = get_solution_cache()
+    if deadline is None:
+        return cache.solve(cube_str, max_depth)
+    solution = cache.get(cube_str, max_depth)
+    if solution is not None:
+        return solution
+    normalized = normalize_cube_string(cube_str)
+    solution = get_supervisor().call(kociemba_solve, (normalized, max_depth), deadline)
+    cache.put(normalized, solution, max_depth)
+    return solution
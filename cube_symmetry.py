@@ -0,0 +1,260 @@
+# 整体对称与换色归一化：把整体旋转、镜像或配色不同的同一局面映射到同一个标准形式
+import argparse
+import heapq
+import itertools
+import os
+import tempfile
+
+import numpy as np
+
+from cube_engine import KOCIEMBA_ORDER, MOVE_INDEX, MOVE_NAMES, MOVE_TABLE, to_kociemba
+from cube_cubie import CORNER_FACELETS, EDGE_FACELETS
+
+# 六个面的外法向量，顺序与FACE_NAMES一致（x向右，y向上，z向前）
+FACE_NORMALS = np.array([
+    (0, 1, 0), (0, -1, 0), (-1, 0, 0), (1, 0, 0), (0, 0, 1), (0, 0, -1),
+], dtype=np.int64)
+
+
+def _sticker_geometry():
+    """每个贴纸所在小块的位置和贴纸朝向，由角块/棱块的贴纸定义推出"""
+    location = np.zeros((54, 3), dtype=np.int64)
+    normal = FACE_NORMALS[np.arange(54) // 9]
+    for cubie in itertools.chain(CORNER_FACELETS, EDGE_FACELETS):
+        position = FACE_NORMALS[cubie // 9].sum(axis=0)
+        location[cubie] = position
+    centers = np.arange(4, 54, 9)
+    location[centers] = FACE_NORMALS
+    return location, normal
+
+
+def _build_symmetries():
+    """48个整体对称（24个旋转 + 24个镜像）的3x3矩阵和对应的贴纸置换
+
+    置换按 new_state = state[perm] 使用；前24个为旋转，后24个为镜像。
+    """
+    location, normal = _sticker_geometry()
+    index = {(tuple(l), tuple(n)): i for i, (l, n) in enumerate(zip(location, normal))}
+    matrices = []
+    for axes in itertools.permutations(range(3)):
+        for signs in itertools.product((1, -1), repeat=3):
+            matrix = np.zeros((3, 3), dtype=np.int64)
+            matrix[range(3), axes] = signs
+            matrices.append(matrix)
+    # 旋转在前（行列式为1），单位矩阵排第一个
+    matrices.sort(key=lambda m: (-round(np.linalg.det(m)), not (m == np.eye(3)).all()))
+    perms = np.empty((len(matrices), 54), dtype=np.intp)
+    for s, matrix in enumerate(matrices):
+        for i in range(54):
+            j = index[(tuple(matrix @ location[i]), tuple(matrix @ normal[i]))]
+            perms[s, j] = i
+    matrices = np.array(matrices)
+    matrices.flags.writeable = False
+    perms.flags.writeable = False
+    return matrices, perms
+
+
+SYMMETRY_MATRICES, SYMMETRY_TABLE = _build_symmetries()
+ROTATION_COUNT = 24
+
+# 对称s把原来第SYMMETRY_TABLE[s][中心]个面的中心移到新的第i个面；
+# 颜色已按中心归一化时，只需用这张表把面编号替换一遍（第7项对应无法识别的颜色6）
+SYMMETRY_RELABEL = np.empty((len(SYMMETRY_TABLE), 7), dtype=np.uint8)
+SYMMETRY_RELABEL[np.arange(len(SYMMETRY_TABLE))[:, None], SYMMETRY_TABLE[:, 4::9] // 9] = np.arange(6)
+SYMMETRY_RELABEL[:, 6] = 6
+
+
+def _build_move_conjugation():
+    """MOVE_CONJUGATION[s, m]为原状态上与“对称s之后的状态上执行m”等效的转动
+
+    即 MOVE_TABLE[m'][P] == P[MOVE_TABLE[m]]（P为SYMMETRY_TABLE[s]）；镜像对称会把顺时针换成逆时针。
+    """
+    conjugation = np.empty((len(SYMMETRY_TABLE), len(MOVE_TABLE)), dtype=np.intp)
+    for s, perm in enumerate(SYMMETRY_TABLE):
+        moved = MOVE_TABLE[:, perm]
+        for m, table in enumerate(MOVE_TABLE):
+            conjugation[s, m] = np.flatnonzero((moved == perm[table]).all(axis=1))[0]
+    conjugation.flags.writeable = False
+    return conjugation
+
+
+MOVE_CONJUGATION = _build_move_conjugation()
+
+
+def normalize_colors(states):
+    """按中心块重新编号颜色：第i个面的中心颜色记为i，其余颜色相应替换
+
+    支持任意配色和任意颜色编号（例如ASCII字母），(54,) 或 (N, 54)。
+    不属于任何中心块的颜色记为6。
+    """
+    states = np.asarray(states)
+    batch = np.atleast_2d(states)
+    rows = np.arange(len(batch))[:, None]
+    lookup = np.full((len(batch), 256), 6, dtype=np.uint8)
+    lookup[rows, batch[:, 4::9]] = np.arange(6, dtype=np.uint8)
+    result = lookup[rows, batch]
+    return result[0] if states.ndim == 1 else result
+
+
+def _pack(states):
+    """把 (N, 54) 状态按字典序打包成三列uint64（每个贴纸3位），比较大小与逐字节比较一致"""
+    words = []
+    for start in range(0, 54, 21):
+        chunk = states[:, start:start + 21].astype(np.uint64)
+        shifts = np.arange(3 * (chunk.shape[1] - 1), -1, -3, dtype=np.uint64)
+        words.append((chunk << shifts).sum(axis=1, dtype=np.uint64))
+    return words
+
+
+def canonicalize_batch(states, mirrors=True, return_symmetry=False):
+    """批量求标准形式：在全部对称下做换色归一化，取字典序最小的结果
+
+    states为 (54,) 或 (N, 54)；mirrors=False时只考虑24个旋转。
+    return_symmetry=True时同时返回每行取到最小值的对称下标（SYMMETRY_TABLE的行号）。
+    """
+    states = np.asarray(states)
+    batch = np.atleast_2d(states)
+    count = len(SYMMETRY_TABLE) if mirrors else ROTATION_COUNT
+    base = normalize_colors(batch)
+    best = base.copy()
+    best_words = _pack(best)
+    best_symmetry = np.zeros(len(batch), dtype=np.int8)
+    for s in range(1, count):
+        candidate = SYMMETRY_RELABEL[s][base[:, SYMMETRY_TABLE[s]]]
+        w0, w1, w2 = _pack(candidate)
+        b0, b1, b2 = best_words
+        less = (w0 < b0) | ((w0 == b0) & ((w1 < b1) | ((w1 == b1) & (w2 < b2))))
+        best[less] = candidate[less]
+        best_symmetry[less] = s
+        for word, new in zip(best_words, (w0, w1, w2)):
+            word[less] = new[less]
+    if states.ndim == 1:
+        best, best_symmetry = best[0], best_symmetry[0]
+    if return_symmetry:
+        return best, best_symmetry
+    return best
+
+
+def canonical_symmetry(state, mirrors=True):
+    """单个 (54,) 状态的快速版本：一次生成全部对称像再取最小，返回 (标准形式, 对称下标)"""
+    count = len(SYMMETRY_TABLE) if mirrors else ROTATION_COUNT
+    base = normalize_colors(state)
+    candidates = SYMMETRY_RELABEL[np.arange(count)[:, None], base[SYMMETRY_TABLE[:count]]]
+    w0, w1, w2 = _pack(candidates)
+    s = int(np.lexsort((np.arange(count), w2, w1, w0))[0])
+    return candidates[s], s
+
+
+def conjugate_moves(moves, symmetry, inverse=False):
+    """把对称后状态上的解法换成原状态上的解法（面字母重新映射，镜像时方向取反）
+
+    inverse=True时反过来，把原状态上的解法换成对称后状态上的解法。
+    """
+    if isinstance(moves, str):
+        moves = moves.split()
+    table = MOVE_CONJUGATION[symmetry]
+    if inverse:
+        table = np.argsort(table)
+    return [MOVE_NAMES[table[MOVE_INDEX[move]]] for move in moves]
+
+
+def canonical_key(state, mirrors=True):
+    """单个状态的标准形式，返回54字节的bytes，可直接作为字典键"""
+    return canonicalize_batch(state, mirrors=mirrors).tobytes()
+
+
+# ---------------- 外部排序去重：数据量超过内存时分块排序后多路归并 ----------------
+
+RECORD_SIZE = 54
+
+
+def _read_chunks(path, text, chunk_size):
+    """逐块读取状态，每块为 (M, 54) 数组
+
+    text为True时每行一个kociemba顺序的54字符串，否则为54字节一条的二进制。
+    """
+    if text:
+        with open(path, "r", encoding="utf-8") as f:
+            lines = (line.strip() for line in f)
+            valid = (line for line in lines if len(line) == 54)
+            while True:
+                chunk = list(itertools.islice(valid, chunk_size))
+                if not chunk:
+                    return
+                states = np.empty((len(chunk), 54), dtype=np.uint8)
+                raw = np.frombuffer("".join(chunk).encode("ascii"), dtype=np.uint8)
+                states[:, KOCIEMBA_ORDER] = raw.reshape(-1, 54)
+                yield states
+    else:
+        data = np.memmap(path, dtype=np.uint8, mode="r").reshape(-1, RECORD_SIZE)
+        for start in range(0, len(data), chunk_size):
+            yield np.array(data[start:start + chunk_size])
+
+
+def _sorted_run(states, mirrors):
+    """对一块状态求标准形式并排序去重，返回按字节序排列的 (M, 54) 数组"""
+    canonical = np.ascontiguousarray(canonicalize_batch(states, mirrors=mirrors))
+    unique = np.unique(canonical.view(f"V{RECORD_SIZE}").ravel())
+    return unique.view(np.uint8).reshape(-1, RECORD_SIZE)
+
+
+def _iter_run(path, block=65536):
+    """按块读取一个已排序的临时文件，逐条返回bytes"""
+    with open(path, "rb") as f:
+        while True:
+            data = f.read(block * RECORD_SIZE)
+            if not data:
+                return
+            for start in range(0, len(data), RECORD_SIZE):
+                yield data[start:start + RECORD_SIZE]
+
+
+def dedup_states(input_path, output_path, chunk_size=1000000, mirrors=True, text=None, tmp_dir=None):
+    """外部排序去重：按对称和配色归一化后，每个等价类只保留一条
+
+    每次只把chunk_size条状态读入内存，排序后写入临时文件，最后多路归并输出。
+    text为None时按扩展名判断（.txt为文本，其余为二进制）；输出格式与输入相同。
+    返回 (读入条数, 输出条数)。
+    """
+    if text is None:
+        text = input_path.endswith(".txt")
+    runs = []
+    total = 0
+    with tempfile.TemporaryDirectory(dir=tmp_dir) as work_dir:
+        for chunk in _read_chunks(input_path, text, chunk_size):
+            total += len(chunk)
+            run_path = os.path.join(work_dir, f"run_{len(runs)}.bin")
+            _sorted_run(chunk, mirrors).tofile(run_path)
+            runs.append(run_path)
+
+        written = 0
+        previous = None
+        mode = "w" if text else "wb"
+        with open(output_path, mode, **({"encoding": "utf-8"} if text else {})) as out:
+            for record in heapq.merge(*(_iter_run(path) for path in runs)):
+                if record == previous:
+                    continue
+                previous = record
+                written += 1
+                if text:
+                    out.write(to_kociemba(np.frombuffer(record, dtype=np.uint8)) + "\n")
+                else:
+                    out.write(record)
+    print(f"去重完成: 读入 {total} 条，输出 {written} 条（{len(runs)} 个分块）")
+    return total, written
+
+
+def main():
+    parser = argparse.ArgumentParser(description="按整体对称和配色对魔方状态去重")
+    parser.add_argument("input", help="输入文件：.txt每行一个54字符状态，其他为54字节一条的二进制")
+    parser.add_argument("output", help="输出文件，格式与输入相同")
+    parser.add_argument("--chunk-size", type=int, default=1000000, help="每块读入内存的状态数")
+    parser.add_argument("--no-mirrors", action="store_true", help="只考虑24个旋转，不考虑镜像")
+    parser.add_argument("--tmp-dir", default=None, help="临时文件目录")
+    args = parser.parse_args()
+    dedup_states(args.input, args.output, chunk_size=args.chunk_size,
+                 mirrors=not args.no_mirrors, tmp_dir=args.tmp_dir)
+
+
+if __name__ == "__main__":
+    main()
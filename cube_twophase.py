@@ -0,0 +1,287 @@
+# 纯Python/NumPy实现的二阶段算法（Kociemba two-phase），不依赖kociemba库
+#
+# 第一阶段把魔方转到 <U, D, R2, L2, F2, B2> 子群（角块、棱块方向正确，中层棱块在中层），
+# 第二阶段只用这10种转动还原。转动表和剪枝表第一次使用时生成并保存为.npy文件，
+# 之后用mmap_mode='r'打开：启动几乎不花时间，多个进程共享同一份物理内存。
+# 剪枝表每个距离只占4位（两个距离打包成一个字节）。
+import os
+import time
+
+import numpy as np
+
+from cube_cubie import MOVE_CUBIES, move_table, state_to_cubie
+from cube_cubie import get_corners, get_flip, get_slice_sorted, get_twist, get_ud_edges
+from cube_engine import MOVE_NAMES, from_kociemba
+from cube_symmetry import normalize_colors
+from cube_validate import VALID, reason_message, validate_batch
+
+# 表文件目录，可用环境变量CUBE_TWOPHASE_TABLES指定
+TABLE_DIR = os.environ.get(
+    "CUBE_TWOPHASE_TABLES", os.path.join(os.path.dirname(os.path.abspath(__file__)), "twophase_tables")
+)
+# 默认的最大步数和时限（秒）
+MAX_LENGTH = 29
+TWOPHASE_BUDGET = 10.0
+
+N_MOVES = len(MOVE_NAMES)
+N_SLICE = 495  # 中层4个棱块所在位置的组合数 C(12, 4)
+N_SLICE_PERM = 24  # 第二阶段中层4个棱块的排列数
+# 第二阶段可用的转动：U U' U2 D D' D2 L2 R2 F2 B2
+PHASE2_MOVES = [0, 1, 2, 3, 4, 5, 8, 11, 14, 17]
+# 剪枝表中表示“尚未访问”的值
+_UNVISITED = 15
+
+# 棱块置换（用于在第一阶段结束时计算U、D层棱块的排列）
+_MOVE_EP = [[int(i) for i in move.ep] for move in MOVE_CUBIES]
+
+
+def _bfs_distances(move_a, move_b, size_b, moves):
+    """组合坐标 a * size_b + b 到已还原状态（坐标0）的最少步数，逐层向量化BFS"""
+    size = len(move_a) * size_b
+    dist = np.full(size, _UNVISITED, dtype=np.uint8)
+    dist[0] = 0
+    frontier = np.zeros(1, dtype=np.int64)
+    depth = 0
+    while len(frontier):
+        a, b = np.divmod(frontier, size_b)
+        following = (move_a[a][:, moves].astype(np.int64) * size_b + move_b[b][:, moves]).ravel()
+        following = following[dist[following] == _UNVISITED]
+        depth += 1
+        if len(following) and depth >= _UNVISITED:
+            raise RuntimeError("剪枝表深度超出4位能表示的范围")
+        # 重复的下标直接重复赋值，再扫描一遍得到不重复的下一层，比np.unique排序快
+        dist[following] = depth
+        frontier = np.flatnonzero(dist == depth)
+    return dist
+
+
+def _pack_nibbles(dist):
+    """两个4位距离打包成一个字节：下标i在第i//2个字节，偶数在低4位"""
+    if len(dist) % 2:
+        dist = np.append(dist, _UNVISITED).astype(np.uint8)
+    return (dist[0::2] | (dist[1::2] << 4)).astype(np.uint8)
+
+
+def _build_tables():
+    """生成全部转动表（uint16，按 坐标*18+转动 展平）和剪枝表（4位打包）"""
+    twist = move_table("twist")
+    flip = move_table("flip")
+    slice_sorted = move_table("slice_sorted")
+    corners = move_table("corners")
+    ud_edges = move_table("ud_edges")
+    # slice_sorted = 位置组合 * 24 + 排列，位置组合的变化与排列无关
+    slice_ = (slice_sorted[::N_SLICE_PERM] // N_SLICE_PERM).astype(np.uint16)
+    # 第二阶段中层棱块始终在中层，位置组合为0，坐标就是排列本身
+    slice_perm = slice_sorted[:N_SLICE_PERM]
+    all_moves = list(range(N_MOVES))
+    return {
+        "twist_move": twist.ravel(),
+        "flip_move": flip.ravel(),
+        "slice_move": slice_.ravel(),
+        "slice_sorted_move": slice_sorted.ravel(),
+        "corners_move": corners.ravel(),
+        "ud_edges_move": ud_edges.ravel(),
+        "twist_slice_prune": _pack_nibbles(_bfs_distances(twist, slice_, N_SLICE, all_moves)),
+        "flip_slice_prune": _pack_nibbles(_bfs_distances(flip, slice_, N_SLICE, all_moves)),
+        "corners_slice_prune": _pack_nibbles(
+            _bfs_distances(corners, slice_perm, N_SLICE_PERM, PHASE2_MOVES)),
+        "ud_edges_slice_prune": _pack_nibbles(
+            _bfs_distances(ud_edges, slice_perm, N_SLICE_PERM, PHASE2_MOVES)),
+    }
+
+
+TABLE_NAMES = (
+    "twist_move", "flip_move", "slice_move", "slice_sorted_move", "corners_move", "ud_edges_move",
+    "twist_slice_prune", "flip_slice_prune", "corners_slice_prune", "ud_edges_slice_prune",
+)
+
+
+def build_tables(table_dir=TABLE_DIR):
+    """生成表并写入table_dir，先写临时文件再改名，多个进程同时生成也不会读到半个文件"""
+    print(f"正在生成二阶段算法的表，保存到 {table_dir} ...")
+    start = time.time()
+    os.makedirs(table_dir, exist_ok=True)
+    for name, table in _build_tables().items():
+        path = os.path.join(table_dir, name + ".npy")
+        temp = f"{path}.{os.getpid()}.tmp"
+        with open(temp, "wb") as f:
+            np.save(f, table)
+        os.replace(temp, path)
+    print(f"表生成完成，用时 {time.time() - start:.1f} 秒")
+
+
+_tables = {}
+
+
+def load_tables(table_dir=TABLE_DIR):
+    """以只读内存映射打开全部表，缺少文件时先生成；返回 名称 -> memoryview 的字典
+
+    memoryview按下标取值直接得到Python整数，比逐个访问NumPy数组快得多，也不复制数据。
+    """
+    tables = _tables.get(table_dir)
+    if tables is None:
+        paths = [os.path.join(table_dir, name + ".npy") for name in TABLE_NAMES]
+        if not all(os.path.exists(path) for path in paths):
+            build_tables(table_dir)
+        tables = {name: memoryview(np.load(path, mmap_mode="r"))
+                  for name, path in zip(TABLE_NAMES, paths)}
+        _tables[table_dir] = tables
+    return tables
+
+
+class _SearchTimeout(Exception):
+    pass
+
+
+def cube_to_cubie(cube_str):
+    """把kociemba字符串转成角块/棱块表示并检查能否还原，不能还原时抛出ValueError"""
+    state = from_kociemba(cube_str)
+    reason = validate_batch(state)
+    if reason != VALID:
+        raise ValueError(reason_message(reason))
+    return state_to_cubie(normalize_colors(state))
+
+
+class TwoPhaseSolver:
+    """二阶段搜索；一个实例可以连续求解多个状态，但不能在多个线程中同时使用"""
+
+    def __init__(self, table_dir=TABLE_DIR):
+        tables = load_tables(table_dir)
+        self.twist_move = tables["twist_move"]
+        self.flip_move = tables["flip_move"]
+        self.slice_move = tables["slice_move"]
+        self.slice_sorted_move = tables["slice_sorted_move"]
+        self.corners_move = tables["corners_move"]
+        self.ud_edges_move = tables["ud_edges_move"]
+        self.twist_slice_prune = tables["twist_slice_prune"]
+        self.flip_slice_prune = tables["flip_slice_prune"]
+        self.corners_slice_prune = tables["corners_slice_prune"]
+        self.ud_edges_slice_prune = tables["ud_edges_slice_prune"]
+
+    def solve(self, cube_str, max_length=MAX_LENGTH, budget=TWOPHASE_BUDGET):
+        """返回不超过max_length步的解法字符串（与kociemba.solve的格式相同）
+
+        按第一阶段步数从少到多搜索，每个第一阶段解都尝试在剩余步数内完成第二阶段，
+        返回找到的第一个解。状态无法还原时抛出ValueError；budget秒内没有找到时抛出TimeoutError。
+        """
+        cubie = cube_to_cubie(cube_str)
+        self.ep = [int(i) for i in cubie.ep]
+        self.corners = int(get_corners(cubie.cp))
+        self.slice_sorted = int(get_slice_sorted(cubie.ep))
+        self.max_length = max_length
+        self.deadline = time.monotonic() + budget
+        self.nodes = 0
+        self.path = []
+        twist = int(get_twist(cubie.co))
+        flip = int(get_flip(cubie.eo))
+        slice_ = self.slice_sorted // N_SLICE_PERM
+        start = self._phase1_bound(twist, flip, slice_)
+        try:
+            for depth in range(start, max_length + 1):
+                if self._phase1(twist, flip, slice_, depth, -1):
+                    return " ".join(MOVE_NAMES[m] for m in self.path)
+        except _SearchTimeout:
+            raise TimeoutError(f"{budget}秒内没有找到不超过{max_length}步的解法") from None
+        raise ValueError(f"没有不超过{max_length}步的解法")
+
+    def _phase1_bound(self, twist, flip, slice_):
+        i = twist * N_SLICE + slice_
+        j = flip * N_SLICE + slice_
+        return max((self.twist_slice_prune[i >> 1] >> ((i & 1) << 2)) & 15,
+                   (self.flip_slice_prune[j >> 1] >> ((j & 1) << 2)) & 15)
+
+    def _tick(self):
+        self.nodes += 1
+        if not self.nodes & 1023 and time.monotonic() > self.deadline:
+            raise _SearchTimeout()
+
+    def _phase1(self, twist, flip, slice_, togo, last):
+        if togo == 0:
+            # 最后一步是第二阶段转动的第一阶段解，去掉这一步就是更短的第一阶段解，已经搜索过
+            if self.path and self.path[-1] in PHASE2_MOVES:
+                return False
+            return self._start_phase2()
+        self._tick()
+        twist_move, flip_move, slice_move = self.twist_move, self.flip_move, self.slice_move
+        twist_prune, flip_prune = self.twist_slice_prune, self.flip_slice_prune
+        path = self.path
+        for m in range(N_MOVES):
+            face = m // 3
+            # 不连续转同一面；相对的两面只按一种顺序转
+            if face == last or (face ^ 1) == last and face < last:
+                continue
+            t = twist_move[twist * N_MOVES + m]
+            f = flip_move[flip * N_MOVES + m]
+            s = slice_move[slice_ * N_MOVES + m]
+            i = t * N_SLICE + s
+            if ((twist_prune[i >> 1] >> ((i & 1) << 2)) & 15) >= togo:
+                continue
+            j = f * N_SLICE + s
+            if ((flip_prune[j >> 1] >> ((j & 1) << 2)) & 15) >= togo:
+                continue
+            path.append(m)
+            if self._phase1(t, f, s, togo - 1, face):
+                return True
+            path.pop()
+        return False
+
+    def _start_phase2(self):
+        """第一阶段结束：计算第二阶段的三个坐标，在剩余步数内搜索第二阶段"""
+        corners, slice_sorted, ep = self.corners, self.slice_sorted, self.ep
+        for m in self.path:
+            corners = self.corners_move[corners * N_MOVES + m]
+            slice_sorted = self.slice_sorted_move[slice_sorted * N_MOVES + m]
+            ep = [ep[i] for i in _MOVE_EP[m]]
+        ud_edges = int(get_ud_edges(ep))
+        slice_perm = slice_sorted
+        i = corners * N_SLICE_PERM + slice_perm
+        j = ud_edges * N_SLICE_PERM + slice_perm
+        bound = max((self.corners_slice_prune[i >> 1] >> ((i & 1) << 2)) & 15,
+                    (self.ud_edges_slice_prune[j >> 1] >> ((j & 1) << 2)) & 15)
+        remaining = self.max_length - len(self.path)
+        last = self.path[-1] // 3 if self.path else -1
+        for depth in range(bound, remaining + 1):
+            if self._phase2(corners, ud_edges, slice_perm, depth, last):
+                return True
+        return False
+
+    def _phase2(self, corners, ud_edges, slice_perm, togo, last):
+        if togo == 0:
+            return True
+        self._tick()
+        corners_move, ud_edges_move, slice_move = self.corners_move, self.ud_edges_move, self.slice_sorted_move
+        corners_prune, edges_prune = self.corners_slice_prune, self.ud_edges_slice_prune
+        path = self.path
+        for m in PHASE2_MOVES:
+            face = m // 3
+            if face == last or (face ^ 1) == last and face < last:
+                continue
+            c = corners_move[corners * N_MOVES + m]
+            e = ud_edges_move[ud_edges * N_MOVES + m]
+            s = slice_move[slice_perm * N_MOVES + m]
+            i = c * N_SLICE_PERM + s
+            if ((corners_prune[i >> 1] >> ((i & 1) << 2)) & 15) >= togo:
+                continue
+            j = e * N_SLICE_PERM + s
+            if ((edges_prune[j >> 1] >> ((j & 1) << 2)) & 15) >= togo:
+                continue
+            path.append(m)
+            if self._phase2(c, e, s, togo - 1, face):
+                return True
+            path.pop()
+        return False
+
+
+_solver = None
+
+
+def solve(cube_str, max_length=MAX_LENGTH, budget=TWOPHASE_BUDGET):
+    """使用进程内共享的求解器求解kociemba字符串，返回解法字符串"""
+    global _solver
+    if _solver is None:
+        _solver = TwoPhaseSolver()
+    return _solver.solve(cube_str, max_length, budget)
+
+
+if __name__ == "__main__":
+    build_tables()
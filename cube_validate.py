@@ -0,0 +1,80 @@
+# 魔方状态快速检查：一次NumPy运算检查 (N, 54) 批量状态能否还原，
+# 在调用任何求解器之前就排除扫描错误的状态
+import numpy as np
+
+from cube_cubie import permutation_parity, state_to_cubie
+from cube_engine import from_kociemba
+from cube_symmetry import normalize_colors
+
+# 检查结果，按检查顺序排列；一个状态有多处错误时返回最先检查到的一项
+VALID = 0
+DUPLICATE_CENTERS = 1
+COLOR_COUNT = 2
+BAD_CORNER = 3
+BAD_EDGE = 4
+DUPLICATE_CORNER = 5
+DUPLICATE_EDGE = 6
+TWIST = 7
+FLIP = 8
+PARITY = 9
+
+REASON_MESSAGES = {
+    VALID: "状态有效",
+    DUPLICATE_CENTERS: "中心块颜色有重复",
+    COLOR_COUNT: "每种颜色应恰好有9个贴纸",
+    BAD_CORNER: "有无法识别的角块（颜色组合不存在）",
+    BAD_EDGE: "有无法识别的棱块（颜色组合不存在）",
+    DUPLICATE_CORNER: "角块不是恰好各出现一次",
+    DUPLICATE_EDGE: "棱块不是恰好各出现一次",
+    TWIST: "角块方向错误：有一个角块需要扭转",
+    FLIP: "棱块方向错误：有一个棱块需要翻转",
+    PARITY: "奇偶性错误：需要交换两个角块或两个棱块",
+}
+
+
+def validate_batch(states):
+    """检查 (N, 54) 或 (54,) 状态（cube_engine的贴纸顺序，任意颜色编号），返回每个状态的检查结果
+
+    返回int8数组（单个状态时为int），VALID表示可以还原，其余取值见REASON_MESSAGES。
+    """
+    states = np.asarray(states)
+    single = states.ndim == 1
+    states = np.atleast_2d(states)
+    n = len(states)
+
+    centers = np.sort(states[:, 4::9], axis=1)
+    duplicate_centers = (centers[:, 1:] == centers[:, :-1]).any(axis=1)
+    colors = normalize_colors(states)
+    counts = (colors[:, :, None] == np.arange(6)).sum(axis=1)
+    bad_counts = (counts != 9).any(axis=1)
+
+    cubie = state_to_cubie(states)
+    bad_corner = (cubie.cp < 0).any(axis=1)
+    bad_edge = (cubie.ep < 0).any(axis=1)
+    duplicate_corner = (np.sort(cubie.cp, axis=1) != np.arange(8)).any(axis=1)
+    duplicate_edge = (np.sort(cubie.ep, axis=1) != np.arange(12)).any(axis=1)
+    twist = cubie.co.sum(axis=1) % 3 != 0
+    flip = cubie.eo.sum(axis=1) % 2 != 0
+    parity = permutation_parity(cubie.cp) != permutation_parity(cubie.ep)
+
+    # 从最后一项往前覆盖，使最先检查到的错误留下
+    reasons = np.zeros(n, dtype=np.int8)
+    for code, failed in (
+        (PARITY, parity), (FLIP, flip), (TWIST, twist),
+        (DUPLICATE_EDGE, duplicate_edge), (DUPLICATE_CORNER, duplicate_corner),
+        (BAD_EDGE, bad_edge), (BAD_CORNER, bad_corner),
+        (COLOR_COUNT, bad_counts), (DUPLICATE_CENTERS, duplicate_centers),
+    ):
+        reasons[failed] = code
+    return int(reasons[0]) if single else reasons
+
+
+def validate_cube_string(cube_str):
+    """检查54字符的kociemba字符串，返回检查结果（长度不对时返回COLOR_COUNT）"""
+    if len(cube_str) != 54:
+        return COLOR_COUNT
+    return validate_batch(from_kociemba(cube_str))
+
+
+def reason_message(reason):
+    return REASON_MESSAGES[int(reason)]
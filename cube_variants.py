@@ -0,0 +1,81 @@
+# 多方向求解：同一局面整体旋转24次、再分别取逆，共48个变体交给进程池同时求解，
+# 把每个结果换回原来的方向后取最短的一个
+#
+# kociemba对不同方向给出的解法长度往往差好几步。变体s的解法经conjugate_moves换回原方向；
+# 逆状态的解法取逆序列即为原状态的解法。
+import queue
+import time
+
+from cube_cache import kociemba_solve
+from cube_cubie import cubie_to_state, inverse, state_to_cubie
+from cube_engine import from_kociemba, invert_moves, to_kociemba
+from cube_portfolio import _context, is_valid_solution
+from cube_symmetry import ROTATION_COUNT, SYMMETRY_RELABEL, SYMMETRY_TABLE, conjugate_moves, normalize_colors
+from cube_validate import VALID, reason_message, validate_batch
+from cube_warmup import warmup
+
+# 默认总时限（秒）
+VARIANT_BUDGET = 5.0
+
+
+def variant_states(cube_str):
+    """返回 [(对称下标, 是否取逆, 变体的kociemba字符串)]，相同的变体只保留一个"""
+    state = from_kociemba(cube_str)
+    reason = validate_batch(state)
+    if reason != VALID:
+        raise ValueError(reason_message(reason))
+    base = normalize_colors(state)
+    inverted = cubie_to_state(inverse(state_to_cubie(base)))
+    variants = []
+    seen = set()
+    for is_inverse, source in ((False, base), (True, inverted)):
+        for s in range(ROTATION_COUNT):
+            target = to_kociemba(SYMMETRY_RELABEL[s][source[SYMMETRY_TABLE[s]]])
+            if target not in seen:
+                seen.add(target)
+                variants.append((s, is_inverse, target))
+    return variants
+
+
+def variant_solution(solution, symmetry, is_inverse):
+    """把变体上的解法换成原状态上的解法（步骤列表）"""
+    steps = conjugate_moves(solution, symmetry)
+    return invert_moves(steps) if is_inverse else steps
+
+
+def solve_variants(cube_str, budget=VARIANT_BUDGET, workers=None, max_depth=None):
+    """同时求解48个方向变体，返回 (最短的有效解法步骤列表, 变体说明)；都失败时返回 (None, None)
+
+    变体放进workers个进程的进程池（默认CPU核数），到达budget秒时结束未完成的变体，
+    用已经得到的最短解法。核数越多，同样时间内完成的变体越多。
+    """
+    variants = variant_states(cube_str)
+    results = queue.SimpleQueue()
+    pool = _context.Pool(workers, initializer=warmup)
+    best, best_label = None, None
+    deadline = time.monotonic() + budget
+    try:
+        for s, is_inverse, target in variants:
+            pool.apply_async(
+                kociemba_solve, (target, max_depth),
+                callback=lambda solution, s=s, i=is_inverse: results.put((s, i, solution)),
+                error_callback=lambda error, s=s, i=is_inverse: results.put((s, i, None)),
+            )
+        for _ in variants:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                s, is_inverse, solution = results.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if solution is None:
+                continue
+            steps = variant_solution(solution, s, is_inverse)
+            if (best is None or len(steps) < len(best)) and is_valid_solution(cube_str, steps):
+                best = steps
+                best_label = f"旋转{s}{'（逆）' if is_inverse else ''}"
+    finally:
+        pool.terminate()
+        pool.join()
+    return best, best_label
@@ -0,0 +1,74 @@
+# 求解表预热：在后台线程中提前加载（或生成）求解表，第一次求解和之后的求解一样快
+import os
+import threading
+from concurrent.futures import Future
+
+from cube_cache import get_solution_cache, kociemba_solve
+
+# 用来预热求解表的任意可解状态
+WARMUP_CUBE = "DRLUUBFBRBLURRLRUBLRDDFDLFUFUFFDBRDUBRUFLLFDDBFLUBLRBD"
+
+# 设置环境变量CUBE_WARMUP=1时，导入本模块即开始后台预热
+WARMUP_ON_IMPORT = os.environ.get("CUBE_WARMUP", "") not in ("", "0")
+
+_lock = threading.Lock()
+_future = None
+_ready = threading.Event()
+
+
+def warmup():
+    """同步预热，返回时求解表已经可用；可以重复调用
+
+    kociemba第一次求解时才加载（或生成）它的表，没有kociemba时则加载（或生成）cube_twophase的表；
+    同时打开解法缓存的数据库。
+    """
+    if _ready.is_set():
+        return
+    kociemba_solve(WARMUP_CUBE)
+    get_solution_cache()
+    _ready.set()
+
+
+def _run_warmup(future):
+    if not future.set_running_or_notify_cancel():
+        return
+    try:
+        warmup()
+    except Exception as e:
+        print(f"预热求解表失败: {str(e)}")
+        future.set_exception(e)
+    else:
+        future.set_result(True)
+
+
+def start_warmup():
+    """在守护线程中开始预热，返回concurrent.futures.Future；重复调用返回同一个Future"""
+    global _future
+    with _lock:
+        if _future is None:
+            _future = Future()
+            threading.Thread(target=_run_warmup, args=(_future,), name="cube-warmup", daemon=True).start()
+        return _future
+
+
+def is_ready():
+    """求解表是否已经预热完成"""
+    return _ready.is_set()
+
+
+def wait_warmup(timeout=None):
+    """如果已经开始后台预热，等它结束（预热失败也返回），返回是否预热完成
+
+    kociemba第一次加载表时不是线程安全的，求解线程应先调用这个函数。
+    """
+    future = _future
+    if future is not None:
+        try:
+            future.result(timeout)
+        except Exception:
+            pass
+    return _ready.is_set()
+
+
+if WARMUP_ON_IMPORT:
+    start_warmup()
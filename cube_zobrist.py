@@ -0,0 +1,90 @@
+# 增量Zobrist哈希：每步转动只查表更新，不用重新扫描整个魔方
+import numpy as np
+
+from cube_engine import MOVE_INDEX, FaceList, faces_to_state
+from cube_cubie import coordinates, move_table
+
+# 这六个坐标合在一起唯一确定魔方状态（颜色按中心块归一化）
+HASH_COORDINATES = ("twist", "flip", "corners", "slice_sorted", "u_edges", "d_edges")
+
+# 固定种子，保证不同进程、不同次运行得到相同的哈希值
+ZOBRIST_SEED = 20250330
+
+_tables = None
+
+
+def _get_tables():
+    """首次使用时生成 (随机键, 异或增量表, 坐标转动表) 三组表，每组按HASH_COORDINATES排列
+
+    异或增量表 delta[x, m] = key[x] ^ key[table[x, m]]。
+    """
+    global _tables
+    if _tables is None:
+        rng = np.random.default_rng(ZOBRIST_SEED)
+        keys, deltas, moves = [], [], []
+        for name in HASH_COORDINATES:
+            table = move_table(name)
+            key = rng.integers(0, 2 ** 64, size=len(table), dtype=np.uint64)
+            keys.append(key)
+            deltas.append(key[:, None] ^ key[table])
+            moves.append(table)
+        _tables = (keys, deltas, moves)
+    return _tables
+
+
+def zobrist_hash(state):
+    """计算单个状态（54元素数组或faces）的64位哈希"""
+    if not isinstance(state, np.ndarray):
+        state = state.state if isinstance(state, FaceList) else faces_to_state(state)
+    keys = _get_tables()[0]
+    coords = coordinates(state)
+    value = 0
+    for key, name in zip(keys, HASH_COORDINATES):
+        value ^= int(key[coords[name]])
+    return value
+
+
+class ZobristHash:
+    """跟随魔方状态的增量哈希
+
+    保存六个坐标和当前哈希值，turn(move)只做六次查表和异或，
+    适合在手动操作、解法播放和搜索中记录访问过的状态。
+    """
+
+    __slots__ = ("coords", "value")
+
+    def __init__(self, state=None):
+        if state is None:
+            state = FaceList().state
+        elif not isinstance(state, np.ndarray):
+            state = state.state if isinstance(state, FaceList) else faces_to_state(state)
+        coords = coordinates(state)
+        self.coords = [int(coords[name]) for name in HASH_COORDINATES]
+        self.value = zobrist_hash(state)
+
+    def turn(self, move):
+        """执行一步转动后更新哈希，move为名称或下标"""
+        move = MOVE_INDEX.get(move, move)
+        _, deltas, tables = _get_tables()
+        coords = self.coords
+        value = self.value
+        for i in range(len(coords)):
+            # item()直接返回Python整数，比下标取值再int()快一倍
+            value ^= deltas[i].item(coords[i], move)
+            coords[i] = tables[i].item(coords[i], move)
+        self.value = value
+        return value
+
+    def apply(self, moves):
+        """依次执行一串转动，返回最终哈希"""
+        if isinstance(moves, str):
+            moves = moves.split()
+        for move in moves:
+            self.turn(move)
+        return self.value
+
+    def copy(self):
+        other = ZobristHash.__new__(ZobristHash)
+        other.coords = list(self.coords)
+        other.value = self.value
+        return other
@@ -11,14 +11,15 @@ from OpenGL.GLUT import *
 import locale
 from pyglet.window import key
 
+import cube_twophase
+
 # 导入魔方求解库kociemba
-import random  # 替换kociemba依赖
 try:
     import kociemba
     has_kociemba = True
 except ImportError:
     has_kociemba = False
-    print("警告：kociemba库未安装，将使用随机步骤代替")
+    print("警告：kociemba库未安装，将使用仓库内的二阶段算法")
 
 locale.setlocale(locale.LC_ALL, "en_US.UTF-8")  # 强制设置英文环境
 
@@ -338,16 +339,14 @@ def solve_cube(faces):
             return solution.split()  # 返回步骤列表，如 ["R", "U'", "F2"]
         except Exception as e:
             print(f"kociemba求解出错: {e}")
-            print("使用随机步骤代替")
+            print("使用仓库内的二阶段算法")
     
-    # 如果kociemba不可用或出错，返回随机步骤
-    possible_moves = ["U", "U'", "U2", "D", "D'", "D2", 
-                     "L", "L'", "L2", "R", "R'", "R2",
-                     "F", "F'", "F2", "B", "B'", "B2"]
-    # 生成10-15步的随机解法
-    num_steps = random.randint(10, 15)
-    solution = [random.choice(possible_moves) for _ in range(num_steps)]
-    return solution  # 返回步骤列表，如 ["R", "U'", "F2"]
+    # 如果kociemba不可用或出错，使用仓库内的二阶段算法
+    try:
+        return cube_twophase.solve(encode_cube(faces)).split()
+    except Exception as e:
+        print(f"二阶段算法求解出错: {e}")
+        return []
 
 # 旋转函数映射表
 MOVE_MAP = {
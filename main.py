@@ -78,6 +78,9 @@ def run_cube_solver(faces_data):
     """
     import cube
     
+    # 打开窗口并启动求解用的后台服务（导入cube不会创建窗口）
+    cube.setup_gui()
+    
     # 使用cube.py中的set_faces函数设置魔方数据
     cube.set_faces(faces_data)
     
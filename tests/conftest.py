@@ -0,0 +1,21 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+# 仓库中的模块都在顶层目录；测试只使用内存中的解法缓存，不写cube_solution_cache.db
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ["CUBE_SOLUTION_CACHE"] = ""
+
+
+@pytest.fixture
+def scrambled():
+    """返回一个生成打乱状态kociemba字符串的函数，固定随机种子"""
+    from cube_engine import scramble_batch, to_kociemba
+
+    def make(n=1, seed=0, length=25):
+        states, _ = scramble_batch(n, length, np.random.default_rng(seed))
+        return [to_kociemba(state) for state in states]
+
+    return make
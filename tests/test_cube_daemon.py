@@ -0,0 +1,102 @@
+import socketserver
+import threading
+import time
+
+import pytest
+
+import cube_daemon
+from cube_portfolio import is_valid_solution
+from cube_supervisor import deadline_after
+
+
+@pytest.fixture(scope="module")
+def daemon():
+    solve_daemon = cube_daemon.SolveDaemon(workers=1)
+    yield solve_daemon
+    solve_daemon.close()
+
+
+@pytest.fixture
+def server(daemon, tmp_path, monkeypatch):
+    """在临时Unix socket上运行守护进程的服务端，客户端函数都连到这里"""
+    if not cube_daemon.USE_UNIX_SOCKET:
+        pytest.skip("需要AF_UNIX")
+    path = str(tmp_path / "daemon.sock")
+    monkeypatch.setattr(cube_daemon, "DAEMON_SOCKET", path)
+    srv = socketserver.ThreadingUnixStreamServer(path, cube_daemon._Handler)
+    srv.daemon_threads = True
+    srv.solve_daemon = daemon
+    thread = threading.Thread(target=srv.serve_forever, daemon=True)
+    thread.start()
+    yield srv
+    srv.shutdown()
+    srv.server_close()
+
+
+def test_identical_requests_share_one_solve(daemon, scrambled, monkeypatch):
+    cube_str = scrambled(seed=22)[0]
+    release = threading.Event()
+    calls = []
+    real_call = daemon._call
+
+    def blocking_call(normalized, max_depth, deadline):
+        calls.append(normalized)
+        release.wait(10)
+        return real_call(normalized, max_depth, deadline)
+
+    monkeypatch.setattr(daemon, "_call", blocking_call)
+    coalesced = daemon.coalesced
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(daemon.solve(cube_str, timeout=20)))
+               for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    limit = time.monotonic() + 10
+    while daemon.coalesced < coalesced + 3 and time.monotonic() < limit:
+        time.sleep(0.01)
+    release.set()
+    for thread in threads:
+        thread.join(20)
+
+    assert len(calls) == 1
+    assert daemon.coalesced == coalesced + 3
+    assert len(results) == 4 and len({solution for solution, _ in results}) == 1
+    assert is_valid_solution(cube_str, results[0][0].split())
+    assert not daemon._inflight
+
+
+def test_invalid_cube_gets_error_reply(server, scrambled):
+    cube_str = scrambled(seed=23)[0]
+    # 交换两个相邻贴纸，颜色数不变但状态无法还原
+    broken = cube_str[1] + cube_str[0] + cube_str[2:]
+    reply = cube_daemon.request_daemon({"cube": broken}, timeout=5)
+    assert reply["solution"] is None and reply["error"]
+    with pytest.raises(ValueError):
+        cube_daemon.daemon_solve(broken, timeout=5)
+    assert is_valid_solution(cube_str, cube_daemon.daemon_solve(cube_str, timeout=20).split())
+
+
+def test_client_falls_back_without_socket(tmp_path, scrambled, monkeypatch):
+    monkeypatch.setattr(cube_daemon, "DAEMON_SOCKET", str(tmp_path / "missing.sock"))
+    monkeypatch.setattr(cube_daemon, "DAEMON_PORT", 1)
+    assert not cube_daemon.is_daemon_running()
+    fallback = []
+    real_solve = cube_daemon.supervised_solve
+
+    def spy(cube_str, deadline, max_depth=None):
+        fallback.append(cube_str)
+        return real_solve(cube_str, deadline, max_depth)
+
+    monkeypatch.setattr(cube_daemon, "supervised_solve", spy)
+    cube_str = scrambled(seed=24)[0]
+    solution = cube_daemon.client_solve(cube_str, deadline_after(20))
+    assert fallback == [cube_str]
+    assert is_valid_solution(cube_str, solution.split())
+
+
+def test_stop_request_and_idle_time(daemon):
+    daemon.last_request = time.monotonic() - 100
+    assert daemon.idle_for() >= 100
+    assert daemon.handle({"op": "stop"}) == {"ok": True}
+    assert daemon.stop_requested.is_set()
+    assert daemon.idle_for() < 1
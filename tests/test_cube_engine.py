@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+
+from cube_cache import kociemba_solve
+from cube_engine import (MOVE_NAMES, SOLVED_STATE, FaceList, apply_moves, from_kociemba, invert_moves, is_solved,
+                         same_effect, simplify_moves, to_kociemba, turn)
+from cube_symmetry import normalize_colors
+
+R_BOTTOM_ROW = slice(33, 36)  # R面（下标3）的最下一行
+F_FACE = 4
+
+
+def test_kociemba_solutions_solve_scrambles(scrambled):
+    for cube_str in scrambled(5, seed=1):
+        state = normalize_colors(from_kociemba(cube_str))
+        assert to_kociemba(state) == cube_str
+        assert is_solved(apply_moves(state, kociemba_solve(cube_str)))
+
+
+def test_d_turns_clockwise_seen_from_below():
+    # 从下往上看顺时针：F面最下一行转到R面，与kociemba的D一致
+    state = apply_moves(SOLVED_STATE, "D")
+    assert (state[R_BOTTOM_ROW] == F_FACE).all()
+    assert kociemba_solve(to_kociemba(state)) == "D'"
+    assert same_effect("D D D", "D'")
+    assert is_solved(apply_moves(state, "D'"))
+
+
+@pytest.mark.parametrize("move", MOVE_NAMES)
+def test_single_moves_match_kociemba(move):
+    state = apply_moves(SOLVED_STATE, move)
+    assert kociemba_solve(to_kociemba(state)).split() == invert_moves([move])
+    # FaceList原地转动与置换表得到相同的状态
+    scrambled_state = apply_moves(SOLVED_STATE, list(np.random.default_rng(3).choice(MOVE_NAMES, 20)))
+    faces = FaceList(scrambled_state)
+    turn(faces, move)
+    assert (faces.state == apply_moves(scrambled_state, move)).all()
+
+
+def test_simplify_examples():
+    assert simplify_moves("U D U'") == ["D"]
+    assert simplify_moves("R U U' R'") == []
+    assert simplify_moves("F F F") == ["F'"]
+    with pytest.raises(ValueError):
+        simplify_moves("R X")
+
+
+@pytest.mark.parametrize("faces", ["UDLRFB", "UD", "RL"])
+def test_simplify_keeps_the_resulting_state(faces):
+    # 只用一两根轴时相邻转动大多可以合并或抵消，更容易覆盖出栈后继续合并的情况
+    names = [name for name in MOVE_NAMES if name[0] in faces]
+    rng = np.random.default_rng(len(faces))
+    for length in (1, 2, 5, 20, 200):
+        moves = list(rng.choice(names, length))
+        simplified = simplify_moves(moves)
+        assert same_effect(simplified, moves)
+        assert len(simplified) <= length
+        assert simplify_moves(simplified) == simplified
+        assert all(a[0] != b[0] for a, b in zip(simplified, simplified[1:]))
+
+
+def test_simplified_solution_still_solves(scrambled):
+    for cube_str in scrambled(3, seed=20):
+        state = normalize_colors(from_kociemba(cube_str))
+        assert is_solved(apply_moves(state, simplify_moves(kociemba_solve(cube_str))))
@@ -0,0 +1,71 @@
+import threading
+
+import pytest
+
+from cube_cache import kociemba_solve
+from cube_portfolio import is_valid_solution
+from cube_speculate import Speculator, neighbour_states
+
+
+class RecordingSolve:
+    """代替求解进程：在当前进程中直接调用kociemba，并记录求解过的状态"""
+
+    def __init__(self):
+        self.solved = []
+
+    def __call__(self, cube_str, deadline):
+        self.solved.append(cube_str)
+        return kociemba_solve(cube_str)
+
+
+@pytest.fixture
+def speculator():
+    speculator = Speculator(solve=RecordingSolve())
+    yield speculator
+    speculator.close()
+
+
+def test_newer_generation_drops_queued_work(speculator, scrambled):
+    old, new = scrambled(2, seed=24)
+    # 先占住推测线程，让两轮推测都在队列中等待
+    gate = threading.Event()
+    speculator._executor.submit(gate.wait, 10)
+    stale = speculator.speculate(old)
+    fresh = speculator.speculate(new)
+    gate.set()
+    stale.result(10)
+    fresh.result(10)
+
+    assert speculator._solve.solved == [new]
+    assert speculator.lookup(old) is None
+    assert is_valid_solution(new, speculator.lookup(new))
+
+
+def test_cancel_drops_queued_work(speculator, scrambled):
+    cube_str = scrambled(seed=25)[0]
+    gate = threading.Event()
+    speculator._executor.submit(gate.wait, 10)
+    future = speculator.speculate(cube_str)
+    speculator.cancel()
+    gate.set()
+    future.result(10)
+    assert speculator._solve.solved == []
+    assert speculator.lookup(cube_str) is None
+
+
+def test_neighbours_are_cached(speculator, scrambled):
+    cube_str = scrambled(seed=26)[0]
+    speculator.neighbours = True
+    speculator.speculate(cube_str).result(30)
+    for neighbour in neighbour_states(cube_str):
+        assert is_valid_solution(neighbour, speculator.lookup(neighbour))
+
+
+def test_default_uses_own_low_priority_worker(scrambled):
+    cube_str = scrambled(seed=27)[0]
+    speculator = Speculator()
+    try:
+        speculator.speculate(cube_str).result(30)
+        assert is_valid_solution(cube_str, speculator.lookup(cube_str))
+    finally:
+        speculator.close()
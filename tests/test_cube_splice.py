@@ -0,0 +1,57 @@
+from cube_cache import kociemba_solve
+from cube_engine import SOLVED_STATE, apply_moves, from_kociemba, is_solved, to_kociemba
+from cube_splice import SpliceRecord
+from cube_symmetry import normalize_colors
+
+MANUAL = ["R", "U", "F'"]
+
+
+def half_solved(cube_str):
+    """执行了一半解法的状态（kociemba字符串）和剩余的步骤"""
+    steps = kociemba_solve(cube_str).split()
+    done, rest = steps[:len(steps) // 2], steps[len(steps) // 2:]
+    state = apply_moves(normalize_colors(from_kociemba(cube_str)), done)
+    return to_kociemba(state), rest
+
+
+def turned(cube_str, moves):
+    return to_kociemba(apply_moves(normalize_colors(from_kociemba(cube_str)), moves))
+
+
+def test_splices_after_manual_moves(scrambled):
+    record = SpliceRecord()
+    cube_str, rest = half_solved(scrambled(seed=25)[0])
+    record.remember(rest)
+    for move in MANUAL:
+        record.record(move)
+    current = turned(cube_str, MANUAL)
+    steps = record.solution(current)
+    assert steps is not None and len(steps) <= len(rest) + len(MANUAL)
+    assert is_solved(apply_moves(normalize_colors(from_kociemba(current)), steps))
+    # 拧回去之后拼接结果就是原来剩余的步骤
+    for move in ("F", "U'", "R'"):
+        record.record(move)
+    assert record.solution(cube_str) == rest
+
+
+def test_reset_forgets_the_solution(scrambled):
+    record = SpliceRecord()
+    cube_str, rest = half_solved(scrambled(seed=26)[0])
+    record.remember(rest)
+    record.forget()
+    record.record("R")
+    assert record.manual_moves == []
+    assert record.solution(cube_str) is None
+    # 重置后的魔方不能用旧的剩余步骤还原
+    record.remember(rest)
+    assert record.solution(to_kociemba(SOLVED_STATE)) is None
+
+
+def test_too_many_manual_moves_stop_splicing(scrambled):
+    record = SpliceRecord(max_moves=2)
+    cube_str, rest = half_solved(scrambled(seed=27)[0])
+    record.remember(rest)
+    for move in MANUAL:
+        record.record(move)
+    assert not record.active
+    assert record.solution(turned(cube_str, MANUAL)) is None
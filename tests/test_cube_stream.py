@@ -0,0 +1,36 @@
+import os
+
+from cube_engine import same_effect
+from cube_stream import iter_line_moves, iter_simplified, iter_solution_file
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_log_format_reads_executed_and_move_lines():
+    log = [
+        "求解魔方: UUUUUUUUURRRRRRRRRFFFFFFFFFDDDDDDDDDLLLLLLLLLBBBBBBBBB\n",
+        "直接求解成功: R U F\n",
+        "执行: R\n",
+        "执行: U\n",
+        "执行: U'\n",
+        "R2 F\n",
+        "魔方已完全还原!\n",
+    ]
+    assert list(iter_line_moves(log)) == ["R", "U", "U'", "R2", "F"]
+    assert list(iter_simplified(log)) == ["R'", "F"]
+
+
+def test_solution_file_reads_only_full_section():
+    path = os.path.join(REPO_DIR, "cube_solution_20250330_095730.txt")
+    with open(path, "r", encoding="utf-8") as f:
+        moves = list(iter_solution_file(f))
+    assert moves == "R U F L D B B' D' L' F' U' R'".split()
+    with open(path, "r", encoding="utf-8") as f:
+        assert list(iter_simplified(f)) == []
+
+
+def test_window_limits_cancellation_but_keeps_effect():
+    moves = ["R", "U", "F", "L"] * 3 + ["L'", "F'", "U'", "R'"] * 3
+    assert list(iter_simplified(moves, window=None)) == []
+    limited = list(iter_simplified(moves, window=2))
+    assert limited and same_effect(limited, moves)
@@ -0,0 +1,23 @@
+import threading
+import time
+
+import pytest
+
+from cube_supervisor import SolveCancelled, SolveSupervisor, deadline_after
+
+
+def test_restart_aborts_running_call():
+    supervisor = SolveSupervisor()
+    try:
+        timer = threading.Timer(0.5, supervisor.restart)
+        timer.start()
+        start = time.monotonic()
+        with pytest.raises(SolveCancelled):
+            supervisor.call(time.sleep, (30,), deadline_after(30))
+        assert time.monotonic() - start < 10
+        assert supervisor.restarts == 1
+        # 被中止后工作进程已经重新启动，后面的调用不受影响
+        assert supervisor.call(abs, (-3,), deadline_after(30)) == 3
+    finally:
+        timer.cancel()
+        supervisor.close()
@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+
+from cube_engine import apply_moves, from_kociemba
+from cube_validate import (COLOR_COUNT, DUPLICATE_CENTERS, FLIP, PARITY, TWIST, VALID, reason_message, validate_batch,
+                           validate_cube_string)
+
+SOLVED = "U" * 9 + "R" * 9 + "F" * 9 + "D" * 9 + "L" * 9 + "B" * 9
+SCRAMBLE = "R U2 F' L D B2 R' D2 F U' L2 B"
+
+
+def edit(cube_str, changes):
+    """按 {下标: 字母} 修改kociemba字符串中的贴纸"""
+    stickers = list(cube_str)
+    for i, letter in changes.items():
+        stickers[i] = letter
+    return "".join(stickers)
+
+
+# kociemba贴纸下标：角块URF = U9(8) R1(9) F3(20)，棱块UR = U6(5) R2(10)，棱块UF = U8(7) F2(19)
+BROKEN = {
+    TWIST: edit(SOLVED, {8: "R", 9: "F", 20: "U"}),
+    FLIP: edit(SOLVED, {5: "R", 10: "U"}),
+    PARITY: edit(SOLVED, {5: "U", 10: "F", 7: "U", 19: "R"}),
+    DUPLICATE_CENTERS: edit(SOLVED, {13: "U", 0: "R"}),
+    COLOR_COUNT: edit(SOLVED, {0: "R"}),
+}
+
+
+@pytest.mark.parametrize("reason", sorted(BROKEN))
+def test_rejects_unsolvable_states(reason):
+    cube_str = BROKEN[reason]
+    assert validate_cube_string(cube_str) == reason
+    # 转动不改变这些不变量，打乱之后仍然检查得出
+    assert validate_batch(apply_moves(from_kociemba(cube_str), SCRAMBLE)) == reason
+    assert reason_message(reason)
+
+
+def test_batch_reports_each_state(scrambled):
+    cube_strs = scrambled(4, seed=18) + [BROKEN[reason] for reason in sorted(BROKEN)]
+    reasons = validate_batch(np.stack([from_kociemba(s) for s in cube_strs]))
+    assert list(reasons) == [VALID] * 4 + sorted(BROKEN)
+    assert validate_cube_string(SOLVED[:-1]) == COLOR_COUNT
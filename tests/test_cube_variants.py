@@ -0,0 +1,15 @@
+from cube_cache import kociemba_solve
+from cube_portfolio import is_valid_solution
+from cube_symmetry import ROTATION_COUNT
+from cube_variants import variant_solution, variant_states
+
+
+def test_every_variant_maps_back_to_a_valid_solution(scrambled):
+    cube_str = scrambled(seed=5)[0]
+    variants = variant_states(cube_str)
+    # 一般的打乱状态没有对称性，24个方向 × {原状态, 逆状态} 互不相同
+    assert len(variants) == 2 * ROTATION_COUNT
+    assert {is_inverse for _, is_inverse, _ in variants} == {False, True}
+    for s, is_inverse, target in variants:
+        steps = variant_solution(kociemba_solve(target), s, is_inverse)
+        assert is_valid_solution(cube_str, steps), (s, is_inverse)